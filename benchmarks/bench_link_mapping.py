@@ -0,0 +1,76 @@
+# bench_link_mapping.py
+"""Compare row -> Link mapping cost for the old and current DBClient paths.
+
+old: dictionary cursor rows (one dict per row) copied into a @dataclass Link via Link(**row)
+new: tuple cursor rows mapped positionally into the NamedTuple Link via Link._make(row)
+
+Usage: python -m benchmarks.bench_link_mapping [--rows 100000] [--repeat 3]
+"""
+import argparse
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from linkbot.models import Link
+
+@dataclass
+class DataclassLink:
+    """The Link model as it was before it became a NamedTuple"""
+    link_id: int
+    web_url: str
+    summary: str
+    category: str
+    creation_date: datetime
+    deleted: bool = False
+    summary_status: str = 'done'
+    summary_attempts: int = 0
+    guild_id: int = 0
+
+def make_rows(count: int) -> list[tuple]:
+    """Tuples shaped like what a MySQL tuple cursor returns for SELECT Link._fields"""
+    start = datetime(2024, 1, 1)
+    summary = "A short summary of the page. " * 7
+    return [
+        (i, f"https://example.com/articles/{i}", summary, "technology/tutorial",
+         start + timedelta(minutes=i), i % 10 == 0, 'done', 1, 1234567890)
+        for i in range(count)
+    ]
+
+def map_old(rows: list[tuple]) -> list:
+    # A dictionary cursor builds a dict per row before Link(**row) copies it
+    columns = Link._fields
+    return [DataclassLink(**dict(zip(columns, row))) for row in rows]
+
+def map_new(rows: list[tuple]) -> list:
+    return [Link._make(row) for row in rows]
+
+def measure(mapper, rows: list[tuple], repeat: int) -> tuple[float, int]:
+    """Best wall time over `repeat` runs and bytes retained by the mapped result"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        mapper(rows)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = mapper(rows)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, retained
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f"Mapping {args.rows} rows (best of {args.repeat})")
+    print(f"{'path':<6} {'time (ms)':>10} {'memory (MB)':>12} {'bytes/row':>10}")
+    for name, mapper in (("old", map_old), ("new", map_new)):
+        seconds, retained = measure(mapper, rows, args.repeat)
+        print(f"{name:<6} {seconds * 1000:>10.1f} {retained / 1e6:>12.2f} {retained / args.rows:>10.0f}")
+
+if __name__ == "__main__":
+    main()
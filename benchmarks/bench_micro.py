@@ -0,0 +1,178 @@
+# bench_micro.py
+"""Microbenchmarks of the CPU-bound helpers on the ingest and command paths.
+
+Each case runs at several input sizes, 10 to 100k links or 1 KB to 5 MB
+pages. Timings are the best per-call time over --repeat runs, with the
+number of calls per run picked like timeit's autorange.
+
+Results can be saved as JSON and compared with a saved baseline. The
+comparison exits with status 1 when a case is more than --threshold slower.
+
+Usage: python -m benchmarks.bench_micro [--save results.json] [--compare baseline.json]
+       [--threshold 0.1] [--filter split_message] [--quick]
+"""
+import argparse
+import json
+import platform
+import sys
+import timeit
+from datetime import datetime, timedelta
+from typing import Callable, NamedTuple
+from benchmarks.bench_link_mapping import make_rows, map_new
+from benchmarks.corpus import page_of_size
+from linkbot.backtick_scrubber import BacktickScrubber
+from linkbot.discord_bot import LinkBot
+from linkbot.link_categorizer import LinkCategorizer
+from linkbot.models import Link, LinkRef
+from linkbot.web_scraper import WebScraper
+
+LINK_COUNTS = (10, 100, 1_000, 10_000, 100_000)
+PAGE_SIZES = (1_000, 64_000, 1_000_000, 5_000_000)
+# --quick stops at these sizes
+QUICK_LINK_COUNT = 1_000
+QUICK_PAGE_SIZE = 64_000
+
+class Case(NamedTuple):
+    name: str
+    sizes: tuple[int, ...]
+    unit: str  # 'links' or 'bytes'
+    setup: Callable[[int], Callable[[], object]]  # size -> function to time
+
+def size_label(size: int, unit: str) -> str:
+    if unit == 'bytes':
+        return f"{size // 1_000_000}MB" if size >= 1_000_000 else f"{size // 1_000}KB"
+    return f"{size // 1_000}k" if size >= 1_000 else str(size)
+
+def make_links(count: int) -> list[Link]:
+    start = datetime(2024, 1, 1)
+    summary = "A short summary of the page. " * 7
+    return [
+        Link(i, f"https://example.com/articles/{i}", summary, LinkCategorizer.CATEGORIES[i % 20].lower(),
+             start + timedelta(minutes=i), False, 'done', 1, 1234567890)
+        for i in range(count)
+    ]
+
+def run_sync(coroutine):
+    """Result of a coroutine that never suspends, without the cost of an event loop"""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("Coroutine suspended")
+
+_bot = None
+
+def bot() -> LinkBot:
+    # Only the formatting methods are benchmarked, they never reach the database or AI clients
+    global _bot
+    if _bot is None:
+        _bot = LinkBot(None, None, run_job_workers=False)
+    return _bot
+
+def setup_extract_html(size: int):
+    html = page_of_size(size)
+    return lambda: WebScraper._extract_html(html)
+
+def setup_scrub_json_backticks(count: int):
+    reply = "```json\n" + json.dumps({"link_ids": [str(i) for i in range(count)]}) + "\n```"
+    return lambda: BacktickScrubber.scrub_json_backticks(reply)
+
+def setup_format_categorized(count: int):
+    categorized: dict[str, list[dict]] = {}
+    for link in make_links(count):
+        categorized.setdefault(link.category, []).append(link._asdict())
+    return lambda: LinkCategorizer.format_categorized(categorized)
+
+def setup_split_message(size: int):
+    text = page_of_size(size)
+    return lambda: bot().split_message(text)
+
+def setup_format_display_links(count: int):
+    refs = [LinkRef(link.link_id, link.web_url, i % 7 == 0, link.creation_date)
+            for i, link in enumerate(make_links(count))]
+    return lambda: bot()._format_display_links(refs)
+
+def setup_build_command_context(count: int):
+    links = make_links(count)
+    return lambda: run_sync(bot()._build_command_context('SEARCH', links, "caching"))
+
+def setup_link_mapping(count: int):
+    rows = make_rows(count)
+    return lambda: map_new(rows)
+
+CASES = (
+    Case('extract_html', PAGE_SIZES, 'bytes', setup_extract_html),
+    Case('scrub_json_backticks', LINK_COUNTS, 'links', setup_scrub_json_backticks),
+    Case('format_categorized', LINK_COUNTS, 'links', setup_format_categorized),
+    Case('split_message', PAGE_SIZES, 'bytes', setup_split_message),
+    Case('format_display_links', LINK_COUNTS, 'links', setup_format_display_links),
+    Case('build_command_context', LINK_COUNTS, 'links', setup_build_command_context),
+    Case('link_mapping', LINK_COUNTS, 'links', setup_link_mapping),
+)
+
+def measure(func: Callable[[], object], repeat: int) -> dict:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    return {'best': min(times), 'mean': sum(times) / len(times), 'number': number}
+
+def run(name_filter: str, quick: bool, repeat: int) -> dict:
+    results = {}
+    for case in CASES:
+        if name_filter and name_filter not in case.name:
+            continue
+        limit = (QUICK_PAGE_SIZE if case.unit == 'bytes' else QUICK_LINK_COUNT) if quick else None
+        for size in case.sizes:
+            if limit is not None and size > limit:
+                continue
+            key = f"{case.name}[{size_label(size, case.unit)}]"
+            results[key] = measure(case.setup(size), repeat)
+            print(f"{key:<36} {results[key]['best'] * 1000:>12.4f} ms", flush=True)
+    return results
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """Print current vs baseline timings, returns False when a case regressed beyond the threshold"""
+    ok = True
+    print(f"\n{'case':<36} {'baseline (ms)':>14} {'current (ms)':>13} {'change':>8}")
+    for key, current in results.items():
+        before = baseline.get(key)
+        if before is None:
+            print(f"{key:<36} {'-':>14} {current['best'] * 1000:>13.4f} {'new':>8}")
+            continue
+        change = current['best'] / before['best'] - 1
+        regressed = change > threshold
+        ok = ok and not regressed
+        print(f"{key:<36} {before['best'] * 1000:>14.4f} {current['best'] * 1000:>13.4f} {change:>+8.1%}"
+              + ("  SLOWER" if regressed else ""))
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file saved with --save")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown, 0.1 = 10%%")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--quick", action="store_true",
+                        help=f"skip inputs over {QUICK_LINK_COUNT} links or {QUICK_PAGE_SIZE // 1000} KB")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = run(args.filter, args.quick, args.repeat)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'python': sys.version.split()[0],
+                'platform': platform.platform(),
+                'results': results
+            }, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# bench_pipeline.py
+"""End-to-end ingest and command benchmark against local stand-ins.
+
+Drives LinkBot.process_shared_links for N concurrent messages and then
+process_command for M concurrent questions. Pages come from a local corpus
+server, completions from a fake OpenRouter server and Discord REST calls
+are answered in-process. Links are stored through the configured storage
+backend, so point the DB_* environment variables at a scratch database, or
+pass --sqlite for a temporary SQLite file; each run uses a fresh random
+guild ID.
+
+A message's latency runs from process_shared_links until the summaries of
+all its links are saved, a command's until its answer is sent.
+
+Usage: python -m benchmarks.bench_pipeline [--messages 200] [--links-per-message 2]
+       [--commands 20] [--workers 8] [--llm-latency 0.2] [--corpus DIR] [--sqlite]
+       [--llm-rate-limit-rate 0.05] [--llm-server-error-rate 0.02] [--llm-malformed-rate 0.02]
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from typing import Optional
+from benchmarks.corpus import generate_pages, load_pages, start_corpus_server
+from benchmarks.fake_discord import FakeDiscordHTTP, FakeGuild, FakeUser, command_channel, make_channel, make_message
+from benchmarks.fake_openrouter import start_fake_openrouter
+from linkbot.discord_bot import LinkBot
+from linkbot.openai_client import OpenAIClient
+from linkbot.sqlite_database import SQLiteDBClient
+from linkbot.storage import StorageBackend, create_db_client
+from linkbot.url_canonicalizer import canonicalize_url
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def report(name: str, count: int, unit: str, elapsed: float, latencies: list[float]):
+    print(f"{name:<9} {count:>6} {unit:<6} {count / elapsed if elapsed else 0:>9.1f}/s "
+          + " ".join(f"p{p}={percentile(latencies, p) * 1000:>8.1f}ms" for p in (50, 95, 99)))
+
+async def bench_links(bot: LinkBot, guild: FakeGuild, source_channel, author: FakeUser,
+                      base_url: str, pages: int, messages: int, links_per_message: int, timeout: float) -> tuple[int, float, list[float]]:
+    """Share `messages` messages at once and wait until every link is summarized"""
+    started: dict[int, float] = {}
+    pending: dict[int, int] = {}
+    message_of_url: dict[str, int] = {}
+    latencies: list[float] = []
+    done = asyncio.Event()
+
+    summarize = bot.job_worker.handlers['summarize']
+
+    async def timed_summarize(job):
+        await summarize(job)
+        index = message_of_url.get(job.payload['url'])
+        if index is not None:
+            pending[index] -= 1
+            if pending[index] == 0:
+                latencies.append(time.perf_counter() - started[index])
+                if len(latencies) == messages:
+                    done.set()
+
+    bot.job_worker.handlers['summarize'] = timed_summarize
+
+    first_id = random.getrandbits(40) << 20
+    shares = []
+    for index in range(messages):
+        urls = [f"{base_url}/page/{random.randrange(pages)}/m{index}-l{k}" for k in range(links_per_message)]
+        for url in urls:
+            # Jobs carry the canonical form of the shared URL
+            message_of_url[canonicalize_url(url)] = index
+        pending[index] = len(urls)
+        shares.append(make_message(first_id + index, "Worth a read " + " ".join(urls), guild, source_channel, author))
+
+    async def share(index: int, message):
+        started[index] = time.perf_counter()
+        await bot.process_shared_links(message)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(share(i, m) for i, m in enumerate(shares)))
+    try:
+        await asyncio.wait_for(done.wait(), timeout)
+    except asyncio.TimeoutError:
+        print(f"Timed out after {timeout}s with {messages - len(latencies)} messages unfinished")
+    elapsed = time.perf_counter() - start
+    return links_per_message * len(latencies), elapsed, latencies
+
+async def bench_commands(bot: LinkBot, guild: FakeGuild, channel, author: FakeUser, commands: int) -> tuple[float, list[float]]:
+    """Ask `commands` questions at once, each answered with stored links as context"""
+    first_id = random.getrandbits(40) << 20
+    latencies: list[float] = []
+
+    async def ask(index: int):
+        message = make_message(first_id + index, f"What did people share about caching? ({index})", guild, channel, author)
+        start = time.perf_counter()
+        await bot.process_command(message)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(ask(i) for i in range(commands)))
+    return time.perf_counter() - start, latencies
+
+def open_db(sqlite_dir: Optional[str]) -> StorageBackend:
+    """A fresh SQLite database in `sqlite_dir`, or the configured backend without one"""
+    if sqlite_dir:
+        return SQLiteDBClient(os.path.join(sqlite_dir, 'bench.db'))
+    return create_db_client()
+
+async def run(args):
+    pages = load_pages(args.corpus) if args.corpus else generate_pages(args.pages)
+    corpus_runner, corpus_url = await start_corpus_server(pages)
+    llm_runner, llm_url = await start_fake_openrouter(
+        latency=args.llm_latency, jitter=args.llm_jitter, rate_limit_rate=args.llm_rate_limit_rate,
+        server_error_rate=args.llm_server_error_rate, malformed_rate=args.llm_malformed_rate
+    )
+
+    ai = OpenAIClient(base_url=llm_url, api_key="benchmark")
+    scratch = tempfile.TemporaryDirectory() if args.sqlite else None
+    bot = LinkBot(open_db(scratch and scratch.name), ai, run_job_workers=True)
+    discord_http = FakeDiscordHTTP(latency=args.discord_latency)
+    discord_http.install(bot)
+
+    guild_id = random.getrandbits(40)
+    links_channel = make_channel(guild_id + 1, 'links')
+    source_channel = make_channel(guild_id + 2, 'general')
+    guild = FakeGuild(guild_id, [links_channel, source_channel])
+    author = FakeUser(guild_id + 3, 'bench-user')
+
+    try:
+        async with bot:
+            bot.settings.set(guild_id, 'links_channel', str(links_channel.id))
+            bot.job_worker.concurrency = args.workers
+            bot.job_worker.start()
+
+            links, elapsed, latencies = await bench_links(
+                bot, guild, source_channel, author, corpus_url, len(pages),
+                args.messages, args.links_per_message, args.timeout
+            )
+            print(f"{args.messages} messages x {args.links_per_message} links, {args.workers} job workers, "
+                  f"{args.llm_latency * 1000:.0f}ms LLM latency, {len(pages)} pages")
+            report("links", links, "links", elapsed, latencies)
+
+            if args.commands:
+                channel = command_channel(bot, guild_id + 4, guild_id)
+                elapsed, latencies = await bench_commands(bot, guild, channel, author, args.commands)
+                report("commands", args.commands, "cmds", elapsed, latencies)
+
+            print(f"LLM requests: {dict(llm_runner.app['stats'])}")
+            print(f"Discord requests: {len(discord_http.calls)}, peak RSS: {peak_rss_mb():.1f} MB")
+    finally:
+        await corpus_runner.cleanup()
+        await llm_runner.cleanup()
+        if scratch:
+            scratch.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--links-per-message", type=int, default=2)
+    parser.add_argument("--commands", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=8, help="job worker tasks")
+    parser.add_argument("--pages", type=int, default=100, help="generated pages when no --corpus is given")
+    parser.add_argument("--corpus", help="directory of saved .html pages to serve instead")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per completion")
+    parser.add_argument("--llm-jitter", type=float, default=0.05)
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0, help="share of completions answered with 429")
+    parser.add_argument("--llm-server-error-rate", type=float, default=0.0, help="share of completions answered with 5xx")
+    parser.add_argument("--llm-malformed-rate", type=float, default=0.0, help="share of completions with invalid JSON")
+    parser.add_argument("--discord-latency", type=float, default=0.05, help="seconds per REST request")
+    parser.add_argument("--sqlite", action="store_true", help="store links in a temporary SQLite file")
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# corpus.py
+"""HTML pages served from a local aiohttp server, standing in for the sites people share"""
+import random
+from pathlib import Path
+from aiohttp import web
+
+WORDS = (
+    "python discord bot database index query cache latency throughput worker queue "
+    "summary category link channel message server scrape page article guide release "
+    "benchmark memory network request response library framework tutorial review"
+).split()
+
+def generate_pages(count: int, min_paragraphs: int = 5, max_paragraphs: int = 60, seed: int = 0) -> list[str]:
+    """Article-like pages with navigation, scripts and a varying amount of body text"""
+    rng = random.Random(seed)
+    pages = []
+    for i in range(count):
+        paragraphs = "\n".join(
+            f"<p>{' '.join(rng.choices(WORDS, k=rng.randint(40, 120)))}.</p>"
+            for _ in range(rng.randint(min_paragraphs, max_paragraphs))
+        )
+        pages.append(f"""<!DOCTYPE html>
+<html><head><title>Article {i}</title>
+<script>window.analytics = {{page: {i}}};</script>
+<style>body {{ font-family: sans-serif; }}</style></head>
+<body><nav><a href="/">Home</a> <a href="/about">About</a></nav>
+<article><h1>Article {i}: {' '.join(rng.choices(WORDS, k=6))}</h1>
+{paragraphs}
+</article><footer>Copyright example.com</footer></body></html>""")
+    return pages
+
+def page_of_size(size: int, seed: int = 0) -> str:
+    """A generated page padded with paragraphs to about `size` bytes"""
+    rng = random.Random(seed)
+    head = '<!DOCTYPE html>\n<html><head><title>Sized page</title><script>var a = 1;</script></head><body><nav><a href="/">Home</a></nav><article>\n'
+    tail = '</article><footer>Copyright example.com</footer></body></html>'
+    paragraphs = []
+    length = len(head) + len(tail)
+    while length < size:
+        paragraph = f"<p>{' '.join(rng.choices(WORDS, k=rng.randint(40, 120)))}.</p>\n"
+        paragraphs.append(paragraph)
+        length += len(paragraph)
+    return head + ''.join(paragraphs) + tail
+
+def load_pages(directory: str) -> list[str]:
+    """Saved pages (*.html, *.htm) from a directory, in name order"""
+    paths = sorted(p for p in Path(directory).iterdir() if p.suffix.lower() in ('.html', '.htm'))
+    if not paths:
+        raise ValueError(f"No .html files in {directory}")
+    return [p.read_text(encoding='utf-8', errors='replace') for p in paths]
+
+async def start_corpus_server(pages: list[str], host: str = '127.0.0.1', port: int = 0) -> tuple[web.AppRunner, str]:
+    """Serve /page/<index>/<anything> as pages[index % len(pages)], returns the runner and base URL.
+
+    The trailing path segment lets every shared link be a distinct URL while
+    reusing the same page bodies.
+    """
+    async def page(request: web.Request) -> web.Response:
+        index = int(request.match_info['index']) % len(pages)
+        return web.Response(text=pages[index], content_type='text/html')
+
+    app = web.Application()
+    app.router.add_get('/page/{index:\\d+}/{slug:.*}', page)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}"
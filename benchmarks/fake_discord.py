@@ -0,0 +1,168 @@
+# fake_discord.py
+"""Discord stand-ins: a REST client that answers locally and minimal guild, channel and message objects"""
+import asyncio
+import itertools
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Optional
+import discord
+
+MESSAGES = '/channels/{channel_id}/messages'
+MESSAGE = '/channels/{channel_id}/messages/{message_id}'
+TYPING = '/channels/{channel_id}/typing'
+
+# Per-channel limits (requests, seconds) close to what Discord reports in its X-RateLimit headers
+DISCORD_RATE_LIMITS = {
+    ('POST', MESSAGES): (5, 5.0),
+    ('PATCH', MESSAGE): (5, 5.0),
+    ('DELETE', MESSAGE): (5, 1.0),
+    ('POST', TYPING): (5, 5.0),
+}
+DISCORD_GLOBAL_LIMIT = (50, 1.0)
+
+class RateLimitBucket:
+    """Fixed window of `limit` requests per `per` seconds, like a Discord rate limit bucket"""
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    async def acquire(self) -> float:
+        """Wait for a free request, returns the seconds spent waiting"""
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            if now >= self.reset_at:
+                self.remaining = self.limit
+                self.reset_at = now + self.per
+            if self.remaining > 0:
+                self.remaining -= 1
+                return waited
+            delay = self.reset_at - now
+            await asyncio.sleep(delay)
+            waited += delay
+
+class FakeDiscordHTTP:
+    """Answers the bot's REST requests with minimal payloads after `latency` seconds and records them.
+
+    Installed in place of `bot.http.request`, so everything above it
+    (PartialMessageable.send, Message.edit, typing, history) runs unchanged.
+    With `rate_limits`, requests wait for their per-channel bucket and the
+    global bucket the way discord.py waits out a 429.
+    """
+
+    def __init__(self, latency: float = 0.0, bot_user_id: int = 1,
+                 rate_limits: Optional[dict] = None, global_limit: Optional[tuple[int, float]] = None):
+        self.latency = latency
+        self.bot_user_id = bot_user_id
+        self.rate_limits = rate_limits or {}
+        self._global_bucket = RateLimitBucket(*global_limit) if global_limit else None
+        self._buckets: dict[tuple, RateLimitBucket] = {}
+        # (time, method, route, seconds waited on rate limits) of every request
+        self.calls: list[tuple[float, str, str, float]] = []
+        # Messages the bot sent, by ID
+        self.messages: dict[int, dict] = {}
+        self._ids = itertools.count(discord.utils.time_snowflake(datetime.now(timezone.utc)))
+
+    def install(self, bot: discord.Client):
+        bot.http.request = self.request
+
+    async def _wait_for_buckets(self, route: discord.http.Route) -> float:
+        waited = 0.0
+        limit = self.rate_limits.get((route.method, route.path))
+        if limit:
+            key = (route.method, route.path, route.channel_id)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = RateLimitBucket(*limit)
+            waited += await bucket.acquire()
+        if self._global_bucket:
+            waited += await self._global_bucket.acquire()
+        return waited
+
+    async def request(self, route: discord.http.Route, **kwargs):
+        waited = await self._wait_for_buckets(route)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.calls.append((time.perf_counter(), route.method, route.path, waited))
+
+        if route.path == MESSAGES:
+            if route.method == 'POST':
+                message = self.message_payload(route.channel_id, next(self._ids), kwargs.get('json') or {})
+                self.messages[int(message['id'])] = message
+                return message
+            if route.method == 'GET':
+                return []
+        if route.path == MESSAGE:
+            message_id = int(route.url.rsplit('/', 1)[1])
+            if route.method == 'DELETE':
+                self.messages.pop(message_id, None)
+                return None
+            if message_id not in self.messages:
+                raise discord.NotFound(SimpleNamespace(status=404, reason='Not Found'), 'Unknown Message')
+            if route.method == 'PATCH':
+                self.messages[message_id] = self.message_payload(route.channel_id, message_id, kwargs.get('json') or {})
+            return self.messages[message_id]
+        return None
+
+    def message_payload(self, channel_id: int, message_id: int, sent: dict) -> dict:
+        return {
+            'id': str(message_id),
+            'channel_id': str(channel_id),
+            'type': 0,
+            'content': sent.get('content') or '',
+            'author': {'id': str(self.bot_user_id), 'username': 'linkbot', 'discriminator': '0', 'avatar': None, 'bot': True},
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'edited_timestamp': None,
+            'tts': False,
+            'mention_everyone': False,
+            'mentions': [],
+            'mention_roles': [],
+            'attachments': [],
+            'embeds': sent.get('embeds') or [],
+            'components': [],
+            'pinned': False,
+        }
+
+    def count(self, method: str, route: str) -> int:
+        return sum(1 for _, m, r, _ in self.calls if m == method and r == route)
+
+    def route_stats(self) -> dict[tuple[str, str], tuple[int, int, float]]:
+        """(requests, requests that waited on a rate limit, total seconds waited) per route"""
+        stats: dict[tuple[str, str], tuple[int, int, float]] = {}
+        for _, method, path, waited in self.calls:
+            count, limited, total = stats.get((method, path), (0, 0, 0.0))
+            stats[(method, path)] = (count + 1, limited + (waited > 0), total + waited)
+        return stats
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str):
+        self.id = user_id
+        self.name = name
+        self.mention = f"<@{user_id}>"
+        self.display_name = name
+        self.guild_permissions = discord.Permissions.all()
+
+    def __str__(self) -> str:
+        return self.name
+
+class FakeGuild:
+    def __init__(self, guild_id: int, channels: list):
+        self.id = guild_id
+        self.channels = channels
+
+    def get_channel(self, channel_id: int):
+        return next((c for c in self.channels if c.id == channel_id), None)
+
+def make_channel(channel_id: int, name: str):
+    return SimpleNamespace(id=channel_id, name=name)
+
+def make_message(message_id: int, content: str, guild: FakeGuild, channel, author: FakeUser):
+    return SimpleNamespace(id=message_id, content=content, guild=guild, channel=channel, author=author)
+
+def command_channel(bot: discord.Client, channel_id: int, guild_id: Optional[int] = None) -> discord.PartialMessageable:
+    """A channel whose send, typing and history go through the bot's (fake) HTTP client"""
+    return bot.get_partial_messageable(channel_id, guild_id=guild_id)
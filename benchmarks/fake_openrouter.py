@@ -0,0 +1,170 @@
+# fake_openrouter.py
+"""OpenRouter-compatible chat completions server with canned answers for each LinkBot prompt.
+
+Answers are deterministic for a given prompt. Latency, 429s, 5xx errors and
+malformed JSON replies can be injected at configurable rates, drawn from a
+seeded random generator so runs are reproducible. Requests with
+"stream": true are answered as server-sent events.
+
+Run it standalone and point the bot at it with OPENROUTER_BASE_URL:
+
+Usage: python -m benchmarks.fake_openrouter [--port 8080] [--latency 0.2] [--rate-limit-rate 0.05]
+       [--server-error-rate 0.02] [--malformed-rate 0.02] [--seed 0]
+  then OPENROUTER_BASE_URL=http://127.0.0.1:8080/api/v1 python -m linkbot
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from collections import Counter
+from aiohttp import web
+from linkbot.link_categorizer import LinkCategorizer
+
+def canned_reply(messages: list[dict]) -> str:
+    """Deterministic answer for the prompt OpenAIClient sent, chosen by its system message"""
+    system = messages[0]['content'] if messages else ''
+    user = messages[-1]['content'] if messages else ''
+
+    if 'Determine how to process the user request' in system:
+        return json.dumps({"command_type": "SEARCH", "timeframe_days": None, "max_results": 25})
+    if 'Analyze this content' in system:
+        categories = LinkCategorizer.CATEGORIES
+        return json.dumps({
+            "summary": f"A page of {len(user.split())} words. " + " ".join(user.split()[:60]),
+            "category": categories[len(user) % len(categories)]
+        })
+    if 'Return IDs of relevant links' in system:
+        link_ids = re.findall(r'ID: (\d+)', user)
+        return json.dumps({"link_ids": link_ids[::2]})
+    return "Here is what I found:\n" + "\n".join(
+        f"- {line[:120]}" for line in user.splitlines()[:10]
+    )
+
+def error_response(status: int, message: str, headers: dict = None) -> web.Response:
+    return web.json_response({"error": {"message": message, "code": status}}, status=status, headers=headers)
+
+def create_app(latency: float = 0.0, jitter: float = 0.0, rate_limit_rate: float = 0.0,
+               server_error_rate: float = 0.0, malformed_rate: float = 0.0, retry_after: float = 1.0,
+               stream_chunk_size: int = 16, seed: int = 0) -> web.Application:
+    """App answering POST /api/v1/chat/completions after `latency` ± `jitter` seconds.
+
+    Each request fails with a 429 (with Retry-After) with probability
+    `rate_limit_rate`, with a 500, 502 or 503 with probability
+    `server_error_rate`, and otherwise gets a reply cut in half, which is
+    no longer valid JSON, with probability `malformed_rate`. Counts of each
+    outcome are kept in app['stats'] and served at GET /stats.
+    """
+    rng = random.Random(seed)
+    stats = Counter()
+
+    async def chat_completions(request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        stats['requests'] += 1
+        await asyncio.sleep(max(0.0, latency + rng.uniform(-jitter, jitter)))
+
+        roll = rng.random()
+        if roll < rate_limit_rate:
+            stats['rate_limited'] += 1
+            return error_response(429, "Rate limit exceeded", {'Retry-After': str(retry_after)})
+        roll -= rate_limit_rate
+        if roll < server_error_rate:
+            stats['server_error'] += 1
+            return error_response(rng.choice((500, 502, 503)), "Upstream provider error")
+        roll -= server_error_rate
+
+        content = canned_reply(body.get('messages', []))
+        if roll < malformed_rate:
+            stats['malformed'] += 1
+            content = content[:len(content) // 2]
+        else:
+            stats['ok'] += 1
+
+        completion_id = f"chatcmpl-{rng.getrandbits(48):x}"
+        model = body.get('model', 'fake')
+        prompt_tokens = sum(len(str(m.get('content', ''))) for m in body.get('messages', [])) // 4
+        completion_tokens = len(content) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+        if body.get('stream'):
+            return await stream_completion(request, completion_id, model, content, usage)
+        return web.json_response({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        })
+
+    async def stream_completion(request: web.Request, completion_id: str, model: str,
+                                content: str, usage: dict) -> web.StreamResponse:
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache'})
+        await response.prepare(request)
+
+        async def send(delta: dict, finish_reason=None, **extra):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        await send({"role": "assistant", "content": ""})
+        for start in range(0, len(content), stream_chunk_size):
+            await send({"content": content[start:start + stream_chunk_size]})
+            await asyncio.sleep(0)
+        await send({}, "stop", usage=usage)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def get_stats(request: web.Request) -> web.Response:
+        return web.json_response(dict(stats))
+
+    app = web.Application(client_max_size=16 * 1024 * 1024)
+    app['stats'] = stats
+    app.router.add_post('/api/v1/chat/completions', chat_completions)
+    app.router.add_get('/stats', get_stats)
+    return app
+
+async def start_fake_openrouter(host: str = '127.0.0.1', port: int = 0, **options) -> tuple[web.AppRunner, str]:
+    """Start the server with create_app(**options), returns the runner and the base URL to give the OpenAI client"""
+    runner = web.AppRunner(create_app(**options), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}/api/v1"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each answer")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--server-error-rate", type=float, default=0.0, help="share of requests answered with 5xx")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="share of replies cut to invalid JSON")
+    parser.add_argument("--stream-chunk-size", type=int, default=16, help="characters per streamed chunk")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.jitter, args.rate_limit_rate, args.server_error_rate,
+                     args.malformed_rate, args.retry_after, args.stream_chunk_size, args.seed)
+    print(f"Serving chat completions at http://{args.host}:{args.port}/api/v1")
+    web.run_app(app, host=args.host, port=args.port, print=None, access_log=None)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# load_discord.py
+"""Load test LinkBot's event handlers without a Discord connection.
+
+Injects on_message and on_raw_reaction_add events through bot.dispatch,
+the way the gateway does, at --rate events per second spread over
+--channels channels. Outbound sends, edits, deletes and typing calls are
+answered in-process behind simulated Discord rate limit buckets (5 per 5s
+per channel for sends, 50/s global). Pages and completions come from the
+same local stand-ins as bench_pipeline, links are stored through the
+configured storage backend, so point the DB_* environment variables at a
+scratch database or pass --sqlite for a temporary SQLite file.
+
+Reports the injection rate actually reached, event handling latency from
+injection to handler exit, event loop lag, and rate limit waits per route.
+When the loop saturates, the achieved rate falls below --rate and lag grows.
+
+Usage: python -m benchmarks.load_discord [--rate 100] [--channels 50] [--duration 30]
+       [--link-ratio 0.3] [--reaction-ratio 0.05] [--command-ratio 0.01] [--sqlite]
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+from benchmarks.bench_pipeline import open_db, peak_rss_mb, percentile
+from benchmarks.corpus import generate_pages, start_corpus_server
+from benchmarks.fake_discord import (
+    DISCORD_GLOBAL_LIMIT, DISCORD_RATE_LIMITS, FakeDiscordHTTP, FakeGuild, FakeUser,
+    command_channel, make_channel, make_message
+)
+from benchmarks.fake_openrouter import start_fake_openrouter
+from linkbot.discord_bot import LinkBot
+from linkbot.openai_client import OpenAIClient
+
+CHATTER = "Has anyone tried the new release yet? The docs look much better than last time."
+
+async def monitor_loop_lag(interval: float, lags: list[float]):
+    """Record how late the event loop wakes a task sleeping `interval` seconds"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+def time_handler(bot: LinkBot, event: str, latencies: dict[str, list[float]]):
+    """Wrap bot.on_<event> to record the time from injection to handler exit"""
+    handler = getattr(bot, f"on_{event}")
+
+    async def timed(item):
+        try:
+            await handler(item)
+        finally:
+            latencies[event].append(time.perf_counter() - item.injected_at)
+
+    setattr(bot, f"on_{event}", timed)
+
+async def run(args):
+    corpus_runner, corpus_url = await start_corpus_server(generate_pages(args.pages))
+    llm_runner, llm_url = await start_fake_openrouter(latency=args.llm_latency, jitter=args.llm_latency / 4)
+
+    ai = OpenAIClient(base_url=llm_url, api_key="benchmark")
+    scratch = tempfile.TemporaryDirectory() if args.sqlite else None
+    bot = LinkBot(open_db(scratch and scratch.name), ai, run_job_workers=True)
+    discord_http = FakeDiscordHTTP(
+        latency=args.discord_latency,
+        rate_limits=DISCORD_RATE_LIMITS,
+        global_limit=DISCORD_GLOBAL_LIMIT if not args.no_global_limit else None
+    )
+    discord_http.install(bot)
+
+    guild_id = random.getrandbits(40)
+    links_channel_id, commands_channel_id = guild_id + 1, guild_id + 2
+    sources = [make_channel(guild_id + 100 + i, f"general-{i}") for i in range(args.channels)]
+    guild = FakeGuild(guild_id, [make_channel(links_channel_id, 'links'), *sources])
+    commands = command_channel(bot, commands_channel_id, guild_id)
+    links = command_channel(bot, links_channel_id, guild_id)
+    # Without a gateway nothing is cached, reactions look their channel up here instead
+    bot.get_channel = {links_channel_id: links, commands_channel_id: commands}.get
+    users = [FakeUser(guild_id + 1000 + i, f"user-{i}") for i in range(50)]
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    time_handler(bot, 'message', latencies)
+    time_handler(bot, 'raw_reaction_add', latencies)
+    lags: list[float] = []
+    injected: dict[str, int] = defaultdict(int)
+    next_id = random.getrandbits(40) << 20
+
+    def next_event():
+        nonlocal next_id
+        next_id += 1
+        author = random.choice(users)
+        roll = random.random()
+        announcements = [m for m in discord_http.messages.values() if int(m['channel_id']) == links_channel_id]
+        if roll < args.reaction_ratio and announcements:
+            return 'raw_reaction_add', SimpleNamespace(
+                guild_id=guild_id, channel_id=links_channel_id, message_id=int(random.choice(announcements)['id']),
+                user_id=author.id, member=author, emoji='❌'
+            )
+        roll -= args.reaction_ratio
+        if roll < args.command_ratio:
+            return 'message', make_message(next_id, f"What was shared about caching? ({next_id})", guild, commands, author)
+        roll -= args.command_ratio
+        channel = random.choice(sources)
+        if roll < args.link_ratio:
+            content = f"Worth a read {corpus_url}/page/{random.randrange(args.pages)}/{next_id}"
+        else:
+            content = CHATTER
+        return 'message', make_message(next_id, content, guild, channel, author)
+
+    try:
+        async with bot:
+            bot.settings.set(guild_id, 'links_channel', str(links_channel_id))
+            bot.settings.set(guild_id, 'command_channel', str(commands_channel_id))
+            bot.job_worker.concurrency = args.workers
+            bot.job_worker.start()
+            monitor = asyncio.create_task(monitor_loop_lag(args.lag_interval, lags))
+
+            start = time.perf_counter()
+            due = start
+            while time.perf_counter() - start < args.duration:
+                event, item = next_event()
+                item.injected_at = time.perf_counter()
+                bot.dispatch(event, item)
+                injected[event] += 1
+                due += 1 / args.rate
+                # Never sleep a negative amount, a saturated loop just injects as fast as it can
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            elapsed = time.perf_counter() - start
+
+            # Let handlers that were already dispatched finish
+            drain_until = time.perf_counter() + args.drain
+            while time.perf_counter() < drain_until and sum(map(len, latencies.values())) < sum(injected.values()):
+                await asyncio.sleep(0.1)
+            monitor.cancel()
+
+            total = sum(injected.values())
+            print(f"Injected {total} events in {elapsed:.1f}s ({total / elapsed:.1f}/s, target {args.rate}/s) "
+                  f"across {args.channels} channels")
+            for event, count in injected.items():
+                handled = latencies[event]
+                print(f"{event:<17} {count:>7} injected {len(handled):>7} handled  "
+                      + " ".join(f"p{p}={percentile(handled, p) * 1000:>8.1f}ms" for p in (50, 95, 99)))
+            print(f"{'event loop lag':<17} " + " ".join(
+                f"p{p}={percentile(lags, p) * 1000:>8.1f}ms" for p in (50, 99)) + f" max={max(lags, default=0) * 1000:.1f}ms")
+
+            print(f"\n{'route':<56} {'requests':>9} {'limited':>8} {'waited (s)':>11}")
+            for (method, path), (count, limited, waited) in sorted(discord_http.route_stats().items()):
+                print(f"{method + ' ' + path:<56} {count:>9} {limited:>8} {waited:>11.1f}")
+            print(f"\nPeak RSS: {peak_rss_mb():.1f} MB")
+    finally:
+        await corpus_runner.cleanup()
+        await llm_runner.cleanup()
+        if scratch:
+            scratch.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=100, help="events per second")
+    parser.add_argument("--channels", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30, help="seconds of injection")
+    parser.add_argument("--link-ratio", type=float, default=0.3, help="share of messages with a link")
+    parser.add_argument("--reaction-ratio", type=float, default=0.05, help="share of events that are ❌ reactions")
+    parser.add_argument("--command-ratio", type=float, default=0.01, help="share of events that are AI questions")
+    parser.add_argument("--workers", type=int, default=8, help="job worker tasks")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--discord-latency", type=float, default=0.05, help="seconds per REST request")
+    parser.add_argument("--no-global-limit", action="store_true", help="only apply per-channel buckets")
+    parser.add_argument("--lag-interval", type=float, default=0.05)
+    parser.add_argument("--sqlite", action="store_true", help="store links in a temporary SQLite file")
+    parser.add_argument("--drain", type=float, default=30, help="seconds to wait for handlers after injecting")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
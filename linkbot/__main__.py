@@ -1,4 +1,12 @@
+import sys
 from .discord_bot import main
 
 if __name__ == "__main__":
-	main()
\ No newline at end of file
+	if len(sys.argv) > 1 and sys.argv[1] == "worker":
+		from .worker import main as worker_main
+		worker_main()
+	elif len(sys.argv) > 1 and sys.argv[1] == "backfill":
+		from .backfill import main as backfill_main
+		backfill_main(sys.argv[2:])
+	else:
+		main(sys.argv[1:])
@@ -0,0 +1,121 @@
+# announcer.py
+import asyncio
+from typing import Any, Callable, Optional
+import discord
+from linkbot.models import SummaryStatus
+
+# Discord's limits on embeds per message, and what is shown of each link so ten of them stay under 6000 characters
+MAX_EMBEDS = 10
+URL_PREVIEW_CHARS = 200
+SUMMARY_PREVIEW_CHARS = 300
+
+class Announcer:
+    """Outbound message queue with one sender per channel.
+
+    Every channel's requests go out one at a time, in order. discord.py
+    waits out a channel's rate limit bucket before each request, and while
+    a request waits, later edits of a message that is already queued are
+    merged into that queued edit, so only the latest content is sent.
+    Edits can instead render their content when they are sent, so a message
+    shows the state of that moment rather than the one it was queued with.
+    Senders exit once their channel's queue is empty.
+    """
+
+    def __init__(self, bot: discord.Client):
+        self.bot = bot
+        # Queued requests per channel as (kwargs, render, futures), by message ID for edits and by a fresh key for sends
+        self._pending: dict[int, dict[Any, tuple[dict, Optional[Callable[[], dict]], list[asyncio.Future]]]] = {}
+        self._senders: dict[int, asyncio.Task] = {}
+
+    async def send(self, channel_id: int, **kwargs) -> discord.Message:
+        """Send a message once the channel's earlier requests are done"""
+        return await self._enqueue(channel_id, object(), kwargs)
+
+    async def edit(self, channel_id: int, message_id: int, render: Optional[Callable[[], dict]] = None,
+                   **kwargs) -> discord.Message:
+        """Edit a message, merged with an edit of the same message that has not been sent yet.
+
+        `render` is called right before the request is sent and returns more
+        keyword arguments of the edit.
+        """
+        return await self._enqueue(channel_id, message_id, kwargs, render)
+
+    async def stop(self):
+        for task in self._senders.values():
+            task.cancel()
+        await asyncio.gather(*self._senders.values(), return_exceptions=True)
+        for pending in self._pending.values():
+            for _, _, futures in pending.values():
+                for future in futures:
+                    future.cancel()
+        self._senders.clear()
+        self._pending.clear()
+
+    def _enqueue(self, channel_id: int, key: Any, kwargs: dict,
+                 render: Optional[Callable[[], dict]] = None) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(channel_id, {})
+        if key in pending:
+            queued_kwargs, queued_render, futures = pending[key]
+            queued_kwargs.update(kwargs)
+            pending[key] = (queued_kwargs, render or queued_render, futures)
+            futures.append(future)
+        else:
+            pending[key] = (kwargs, render, [future])
+        if channel_id not in self._senders:
+            self._senders[channel_id] = asyncio.create_task(self._drain(channel_id))
+        return future
+
+    async def _drain(self, channel_id: int):
+        channel = self.bot.get_partial_messageable(channel_id)
+        pending = self._pending[channel_id]
+        try:
+            while pending:
+                key = next(iter(pending))
+                kwargs, render, futures = pending.pop(key)
+                try:
+                    if render:
+                        kwargs = {**kwargs, **render()}
+                    if isinstance(key, int):
+                        result = await channel.get_partial_message(key).edit(**kwargs)
+                    else:
+                        result = await channel.send(**kwargs)
+                except asyncio.CancelledError:
+                    for future in futures:
+                        future.cancel()
+                    raise
+                except Exception as e:
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for future in futures:
+                    if not future.done():
+                        future.set_result(result)
+        finally:
+            del self._senders[channel_id]
+            if not pending:
+                del self._pending[channel_id]
+
+def status_embed(link: dict) -> discord.Embed:
+    """Embed of one link of a status message, as stored in ingest and summarize payloads"""
+    title = "Duplicate link updated" if link.get('duplicate') else "New link saved"
+    url = link['url']
+    shown = url if len(url) <= URL_PREVIEW_CHARS else url[:URL_PREVIEW_CHARS - 1] + "…"
+    if link.get('summary_status') == SummaryStatus.DONE:
+        status = f"**{link['category']}** — {link['summary'][:SUMMARY_PREVIEW_CHARS]}"
+    elif link.get('summary_status') == SummaryStatus.FAILED:
+        status = SummaryStatus.NO_SUMMARY
+    else:
+        status = "Summarizing…"
+    return discord.Embed(title=title, url=url, description=f"<{shown}>\n{status}")
+
+def status_messages(links: list[dict], author_mention: str) -> list[dict]:
+    """Content and embeds of the status messages announcing `links`, ten links per message"""
+    return [
+        {
+            'content': f"Shared by {author_mention}",
+            'embeds': [status_embed(link) for link in links[start:start + MAX_EMBEDS]]
+        }
+        for start in range(0, len(links), MAX_EMBEDS)
+    ]
@@ -0,0 +1,142 @@
+# backfill.py
+import argparse
+import asyncio
+import logging
+import discord
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+from linkbot.config import (
+    DISCORD_TOKEN, BACKFILL_PAGE_SIZE, RESOLVE_REDIRECTS, REDIRECT_CACHE_SIZE, REDIRECT_CACHE_TTL,
+    JOB_WORKER_ID, JOB_VISIBILITY_TIMEOUT, JOB_MAX_ATTEMPTS, JOB_RETRY_BASE_DELAY, TRACING_FILE, TRACING_OTLP_ENDPOINT
+)
+from linkbot.job_queue import JobQueue
+from linkbot.logging_setup import setup_logging
+from linkbot.metrics import LINKS_INGESTED
+from linkbot.tracing import set_attributes, setup_tracing, traced
+from linkbot.models import BackfillProgress
+from linkbot.url_canonicalizer import extract_urls
+from linkbot.url_resolver import RedirectResolver
+
+logger = logging.getLogger(__name__)
+
+class BackfillService:
+    """Imports links from a channel's history.
+
+    History is read oldest first in pages. Each page's links are bulk
+    inserted with pending summaries and queued as summarize jobs, keyed like
+    the ones of live ingest and the summary sweep, so the job workers
+    summarize each link once. The page's last message ID is stored as a
+    checkpoint, so an interrupted run resumes after it.
+    """
+
+    def __init__(self, db_client, job_queue: JobQueue, url_resolver: RedirectResolver, page_size: int = 100):
+        self.db = db_client
+        self.job_queue = job_queue
+        self.url_resolver = url_resolver
+        self.page_size = page_size
+
+    async def run(self, guild_id: int, channel, since: Optional[datetime] = None,
+                  on_progress: Optional[Callable[[BackfillProgress], Awaitable[None]]] = None) -> BackfillProgress:
+        progress = BackfillProgress()
+        checkpoint = self.get_checkpoint(guild_id, channel.id)
+        after = discord.Object(id=checkpoint) if checkpoint else since
+
+        page = []
+        async for message in channel.history(limit=None, after=after, oldest_first=True):
+            page.append(message)
+            if len(page) >= self.page_size:
+                await self._import_page(guild_id, channel.id, page, progress)
+                page = []
+                if on_progress:
+                    await on_progress(progress)
+        if page:
+            await self._import_page(guild_id, channel.id, page, progress)
+
+        progress.done = True
+        if on_progress:
+            await on_progress(progress)
+        return progress
+
+    @traced('backfill')
+    async def _import_page(self, guild_id: int, channel_id: int, page: list, progress: BackfillProgress):
+        progress.messages_scanned += len(page)
+        set_attributes(**{'backfill.messages': len(page)})
+
+        # Keep the first share of each URL in the page, dated by its message
+        links = {}
+        for message in page:
+            if message.author.bot:
+                continue
+            for url in extract_urls(message.content):
+                links.setdefault(url, message.created_at.astimezone().replace(tzinfo=None))
+        if any(self.url_resolver.should_resolve(url) for url in links):
+            resolved = await asyncio.gather(*(self.url_resolver.resolve(url) for url in links))
+            resolved_links = {}
+            for url, created_at in zip(resolved, links.values()):
+                resolved_links.setdefault(url, created_at)
+            links = resolved_links
+        progress.links_found += len(links)
+
+        if links:
+            saved = self.db.save_links_bulk(guild_id, list(links.items()))
+            LINKS_INGESTED.inc(saved, source='backfill')
+            progress.links_saved += saved
+            # Links that already have a live summarize job are not queued again
+            for link in self.db.get_pending_link_refs(guild_id, list(links)):
+                if self.job_queue.enqueue('summarize', {
+                    'guild_id': guild_id,
+                    'link_id': link.link_id,
+                    'url': link.web_url
+                }, dedupe_key=f"summarize:{link.link_id}", guild_id=guild_id):
+                    progress.queued += 1
+
+        self.save_checkpoint(guild_id, channel_id, page[-1].id)
+
+    def get_checkpoint(self, guild_id: int, channel_id: int) -> Optional[int]:
+        """Last imported message ID of a channel, if a backfill ran before"""
+        return self.db.get_backfill_checkpoint(guild_id, channel_id)
+
+    def save_checkpoint(self, guild_id: int, channel_id: int, message_id: int) -> bool:
+        return self.db.save_backfill_checkpoint(guild_id, channel_id, message_id)
+
+def parse_since(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d")
+
+async def run_backfill(channel_id: int, since: Optional[datetime]):
+    """Backfill one channel over the REST API, without a gateway connection.
+
+    The summaries are left to the job workers of the bot or `python -m linkbot worker`.
+    """
+    from linkbot.storage import create_db_client
+
+    db = create_db_client()
+    resolver = RedirectResolver(db, RESOLVE_REDIRECTS, REDIRECT_CACHE_SIZE, REDIRECT_CACHE_TTL)
+    job_queue = JobQueue(
+        db,
+        worker_id=JOB_WORKER_ID,
+        visibility_timeout=JOB_VISIBILITY_TIMEOUT,
+        max_attempts=JOB_MAX_ATTEMPTS,
+        retry_base_delay=JOB_RETRY_BASE_DELAY
+    )
+    service = BackfillService(db, job_queue, resolver, BACKFILL_PAGE_SIZE)
+    client = discord.Client(intents=discord.Intents.none())
+    async with client:
+        await client.login(DISCORD_TOKEN)
+        channel = await client.fetch_channel(channel_id)
+
+        async def report(progress: BackfillProgress):
+            logger.info("%s", progress)
+
+        await service.run(channel.guild.id, channel, since, on_progress=report)
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(prog="linkbot backfill", description="Import links from a channel's history")
+    parser.add_argument("channel_id", type=int, help="Channel to import")
+    parser.add_argument("--since", type=parse_since, help="Only import messages after this date (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+    setup_logging()
+    setup_tracing("linkbot-backfill", TRACING_FILE, TRACING_OTLP_ENDPOINT)
+    try:
+        asyncio.run(run_backfill(args.channel_id, args.since))
+    except KeyboardInterrupt:
+        pass
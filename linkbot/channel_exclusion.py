@@ -1,49 +1,32 @@
 # channel_exclusion.py
-from datetime import datetime
-from mysql.connector import Error
+from linkbot.lru_cache import LRUCache
 
 class ChannelExclusionService:
-    def __init__(self, db_client):
+    def __init__(self, db_client, cache_ttl: int = 60, cache_size: int = 1024):
         self.db = db_client
+        # Exclusions can be changed from any shard process, so cached lists expire instead of living forever
+        self._cache = LRUCache(cache_size, ttl=cache_ttl, name='excluded_channels')
 
-    def add_excluded_channel(self, channel_id: str) -> bool:
+    def is_excluded(self, guild_id: int, channel_id: str) -> bool:
+        """Check a channel against the guild's cached exclusion list"""
+        excluded = self._cache.get(guild_id)
+        if excluded is None:
+            excluded = set(self.get_excluded_channels(guild_id))
+            self._cache.set(guild_id, excluded)
+        return channel_id in excluded
+
+    def add_excluded_channel(self, guild_id: int, channel_id: str) -> bool:
         """Add a channel to exclusion list"""
-        try:
-            with self.db._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT INTO ExcludedChannels (channel_id, created_at)
-                    VALUES (%s, %s)
-                    ON DUPLICATE KEY UPDATE channel_id=channel_id
-                """, (channel_id, datetime.now()))
-                conn.commit()
-                return cursor.rowcount > 0
-        except Error as e:
-            print(f"Error excluding channel: {e}")
-            return False
+        added = self.db.add_excluded_channel(guild_id, channel_id)
+        self._cache.pop(guild_id)
+        return added
 
-    def remove_excluded_channel(self, channel_id: str) -> bool:
+    def remove_excluded_channel(self, guild_id: int, channel_id: str) -> bool:
         """Remove a channel from exclusion list"""
-        try:
-            with self.db._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    DELETE FROM ExcludedChannels 
-                    WHERE channel_id = %s
-                """, (channel_id,))
-                conn.commit()
-                return cursor.rowcount > 0
-        except Error as e:
-            print(f"Error unexcluding channel: {e}")
-            return False
+        removed = self.db.remove_excluded_channel(guild_id, channel_id)
+        self._cache.pop(guild_id)
+        return removed
 
-    def get_excluded_channels(self) -> list[str]:
+    def get_excluded_channels(self, guild_id: int) -> list[str]:
         """Get all excluded channel IDs"""
-        try:
-            with self.db._get_connection() as conn:
-                cursor = conn.cursor(dictionary=True)
-                cursor.execute("SELECT channel_id FROM ExcludedChannels")
-                return [row['channel_id'] for row in cursor.fetchall()]
-        except Error as e:
-            print(f"Error fetching excluded channels: {e}")
-            return []
\ No newline at end of file
+        return self.db.get_excluded_channels(guild_id)
@@ -0,0 +1,40 @@
+# channel_resolver.py
+import discord
+from typing import Optional
+
+class ChannelResolver:
+    """Resolves configured channels per guild without scanning guild.channels on every message.
+
+    A configured channel is either a channel ID or a channel name. Name
+    lookups are cached as name -> channel ID (including misses) until a
+    channel in that guild is created, renamed or deleted.
+    """
+
+    def __init__(self):
+        self._ids: dict[int, dict[str, Optional[int]]] = {}
+
+    def resolve(self, guild: discord.Guild, channel: Optional[str]) -> Optional[discord.abc.GuildChannel]:
+        if not channel:
+            return None
+        if channel.isdigit():
+            return guild.get_channel(int(channel))
+
+        names = self._ids.setdefault(guild.id, {})
+        if channel in names:
+            channel_id = names[channel]
+            return guild.get_channel(channel_id) if channel_id else None
+
+        found = discord.utils.get(guild.channels, name=channel)
+        names[channel] = found.id if found else None
+        return found
+
+    def matches(self, channel, configured: Optional[str]) -> bool:
+        """Check whether a channel is the configured one"""
+        if not configured:
+            return False
+        if configured.isdigit():
+            return channel.id == int(configured)
+        return getattr(channel, 'name', None) == configured
+
+    def invalidate(self, guild_id: int):
+        self._ids.pop(guild_id, None)
@@ -1,20 +1,112 @@
 # config.py (unchanged)
 import os
+import socket
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Storage backend: mysql (DB_* settings below) or sqlite (a single local file at SQLITE_PATH)
+DB_BACKEND = os.getenv('DB_BACKEND', 'mysql').lower()
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'linkbot.db')
+
 DB_CONFIG = {
     'host': os.getenv('DB_HOST'),
     'user': os.getenv('DB_USER'),
     'password': os.getenv('DB_PASSWORD'),
     'database': os.getenv('DB_SCHEMA')
 }
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
 
 OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY')
+# Any OpenAI-compatible chat completions API, e.g. benchmarks/fake_openrouter.py for offline runs
+OPENROUTER_BASE_URL = os.getenv('OPENROUTER_BASE_URL', 'https://openrouter.ai/api/v1')
 DEEPSEEK_MODEL = "deepseek/deepseek-chat"
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 LINKS_CHANNEL = os.getenv('LINKS_CHANNEL')#'links'
 COMMAND_CHANNEL = os.getenv('COMMAND_CHANNEL')#'bot-commands'
 PRODUCTS_CHANNEL = os.getenv('PRODUCTS_CHANNEL')
 CONTEXT_MESSAGE_COUNT = int(os.getenv('CONTEXT_MESSAGE_COUNT', 5))
+
+# Background job workers
+JOB_WORKER_COUNT = int(os.getenv('JOB_WORKER_COUNT', 2))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 2))
+SUMMARY_MAX_ATTEMPTS = int(os.getenv('SUMMARY_MAX_ATTEMPTS', 3))
+SUMMARY_BACKFILL_INTERVAL = int(os.getenv('SUMMARY_BACKFILL_INTERVAL', 1800))
+JOB_WORKER_ID = os.getenv('JOB_WORKER_ID', f"{socket.gethostname()}:{os.getpid()}")
+JOB_VISIBILITY_TIMEOUT = int(os.getenv('JOB_VISIBILITY_TIMEOUT', 300))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+JOB_RETRY_BASE_DELAY = int(os.getenv('JOB_RETRY_BASE_DELAY', 10))
+# Set to false to run the bot as a gateway that only enqueues jobs for `python -m linkbot worker`
+RUN_JOB_WORKERS = os.getenv('RUN_JOB_WORKERS', 'true').lower() == 'true'
+# The summary sweep runs in gateway processes only, set to false on all but one when shards are split over processes
+RUN_SUMMARY_SWEEP = os.getenv('RUN_SUMMARY_SWEEP', 'true').lower() == 'true'
+
+def parse_shard_ids(value):
+    """Parse shard ids like "0-3,8" into a list of ints, None when unset"""
+    if not value:
+        return None
+    shard_ids = []
+    for part in value.split(','):
+        start, _, end = part.strip().partition('-')
+        shard_ids.extend(range(int(start), int(end or start) + 1))
+    return shard_ids
+
+# Sharding: leave unset to let Discord pick the shard count and run all shards in this process
+SHARD_COUNT = int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None
+SHARD_IDS = parse_shard_ids(os.getenv('SHARD_IDS'))
+EXCLUSION_CACHE_TTL = int(os.getenv('EXCLUSION_CACHE_TTL', 60))
+# Members are not cached by discord.py, reaction permission checks use this bounded cache instead
+MEMBER_CACHE_SIZE = int(os.getenv('MEMBER_CACHE_SIZE', 1024))
+MEMBER_CACHE_TTL = int(os.getenv('MEMBER_CACHE_TTL', 600))
+
+# Per-guild settings override LINKS_CHANNEL, COMMAND_CHANNEL, PRODUCTS_CHANNEL and CONTEXT_MESSAGE_COUNT
+GUILD_SETTINGS_CACHE_TTL = int(os.getenv('GUILD_SETTINGS_CACHE_TTL', 60))
+# Guild that owns links and exclusions saved before data was partitioned by guild
+LEGACY_GUILD_ID = int(os.getenv('LEGACY_GUILD_ID')) if os.getenv('LEGACY_GUILD_ID') else None
+
+# Links per page of !display-links and !categorized-links, sized to fit one Discord message
+DISPLAY_LINKS_PAGE_SIZE = int(os.getenv('DISPLAY_LINKS_PAGE_SIZE', 15))
+CATEGORIZED_LINKS_PAGE_SIZE = int(os.getenv('CATEGORIZED_LINKS_PAGE_SIZE', 6))
+LINK_PAGE_TIMEOUT = int(os.getenv('LINK_PAGE_TIMEOUT', 300))
+
+# History backfill
+BACKFILL_PAGE_SIZE = int(os.getenv('BACKFILL_PAGE_SIZE', 100))
+
+# URL canonicalization. Short links and AMP pages are always resolved, set RESOLVE_REDIRECTS
+# to follow redirects of every URL, which costs one HEAD request per new URL
+RESOLVE_REDIRECTS = os.getenv('RESOLVE_REDIRECTS', 'false').lower() == 'true'
+REDIRECT_CACHE_SIZE = int(os.getenv('REDIRECT_CACHE_SIZE', 4096))
+REDIRECT_CACHE_TTL = int(os.getenv('REDIRECT_CACHE_TTL', 86400))
+# Rewrite links saved before canonicalization on startup, only needed once after upgrading
+CANONICALIZE_STORED_URLS = os.getenv('CANONICALIZE_STORED_URLS', 'false').lower() == 'true'
+
+# Recently saved links by canonical URL, so ❌ reactions on fresh announcements skip the database.
+# Saves and deletes made by other processes reach this cache when entries expire after LINK_CACHE_TTL
+LINK_CACHE_SIZE = int(os.getenv('LINK_CACHE_SIZE', 4096))
+LINK_CACHE_TTL = int(os.getenv('LINK_CACHE_TTL', 300))
+
+# Serve Prometheus metrics on http://METRICS_HOST:METRICS_PORT/metrics, off when METRICS_PORT is unset.
+# `python -m linkbot worker` uses WORKER_METRICS_PORT instead, every process on a host needs its own port
+METRICS_HOST = os.getenv('METRICS_HOST', '0.0.0.0')
+METRICS_PORT = int(os.getenv('METRICS_PORT')) if os.getenv('METRICS_PORT') else None
+WORKER_METRICS_PORT = int(os.getenv('WORKER_METRICS_PORT')) if os.getenv('WORKER_METRICS_PORT') else None
+
+# Tracing needs the `tracing` extra. Spans go to a JSON lines file and/or an OTLP/HTTP collector,
+# e.g. TRACING_OTLP_ENDPOINT=http://localhost:4318/v1/traces
+TRACING_FILE = os.getenv('TRACING_FILE')
+TRACING_OTLP_ENDPOINT = os.getenv('TRACING_OTLP_ENDPOINT')
+
+# Logging. LOG_FORMAT is text or json. LOG_DEBUG_CONTEXT logs the context sent with each AI request
+# to the linkbot.context logger; payload dumps are cut to LOG_PAYLOAD_MAX_CHARS and only a
+# LOG_PAYLOAD_SAMPLE_RATE share of them is logged
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_DEBUG_CONTEXT = os.getenv('LOG_DEBUG_CONTEXT', 'false').lower() == 'true'
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv('LOG_PAYLOAD_MAX_CHARS', 500))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', 1.0))
+
+# PDFs larger than PDF_MAX_BYTES are described by their metadata only, otherwise the first pages are summarized
+PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', 5))
+PDF_MAX_BYTES = int(os.getenv('PDF_MAX_BYTES', 20 * 1024 * 1024))
+# HTML and text pages are read up to PAGE_MAX_BYTES, the rest of the body is never downloaded
+PAGE_MAX_BYTES = int(os.getenv('PAGE_MAX_BYTES', 5 * 1024 * 1024))
@@ -1,25 +1,28 @@
 # database.py
-import os
-import mysql.connector
-from mysql.connector import Error, pooling
+import json
+import logging
+from mysql.connector import Error, errorcode, pooling
 from contextlib import contextmanager
-from typing import Optional, List
-from linkbot.models import Link
+from typing import Optional, List, Tuple
+from linkbot.config import DB_CONFIG, DB_POOL_SIZE
+from linkbot.metrics import DB_POOL_WAIT_SECONDS
+from linkbot.storage import StorageBackend, instrumented, search_terms
+from linkbot.url_canonicalizer import canonicalize_url
+from linkbot.models import Job, Link, LinkRef, SaveResult, SummaryStatus
 from datetime import datetime
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+logger = logging.getLogger(__name__)
 
-class DBClient:
-    def __init__(self):
-        self.config = {
-            'host': os.getenv('DB_HOST'),
-            'user': os.getenv('DB_USER'),
-            'password': os.getenv('DB_PASSWORD'),
-            'database': os.getenv('DB_SCHEMA')
-        }
+class DBClient(StorageBackend):
+    """MySQL storage backend"""
+
+    def __init__(self, config: dict = DB_CONFIG, pool_size: int = DB_POOL_SIZE):
+        super().__init__()
+        self.config = config
         self.pool = pooling.MySQLConnectionPool(
             pool_name="bot_pool",
-            pool_size=5,
+            pool_size=pool_size,
             pool_reset_session=True,
             **self.config
         )
@@ -27,7 +30,8 @@ class DBClient:
 
     @contextmanager
     def _get_connection(self):
-        conn = self.pool.get_connection()
+        with DB_POOL_WAIT_SECONDS.time():
+            conn = self.pool.get_connection()
         try:
             if not conn.is_connected():
                 conn.reconnect(attempts=3, delay=5)
@@ -60,58 +64,335 @@ class DBClient:
                         created_at DATETIME NOT NULL
                     ) ENGINE=InnoDB;
                 """)
+
+                # Create Jobs table backing the background work queue.
+                # available_at doubles as the lease expiry of running jobs.
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS Jobs (
+                        job_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                        job_type VARCHAR(64) NOT NULL,
+                        payload TEXT NOT NULL,
+                        status VARCHAR(16) NOT NULL DEFAULT 'queued',
+                        dedupe_key VARCHAR(255) NULL UNIQUE,
+                        attempts INT NOT NULL DEFAULT 0,
+                        locked_by VARCHAR(255) NULL,
+                        last_error TEXT NULL,
+                        available_at DATETIME NOT NULL,
+                        created_at DATETIME NOT NULL,
+                        updated_at DATETIME NOT NULL,
+                        INDEX idx_jobs_claim (status, available_at)
+                    ) ENGINE=InnoDB;
+                """)
+
+                # Summary state for deferred summarization
+                if self._ensure_column(cursor, 'Links', 'summary_status', "VARCHAR(16) NOT NULL DEFAULT 'done'"):
+                    # Links saved before the queue existed get re-summarized by the backfill sweep
+                    cursor.execute("""
+                        UPDATE Links
+                        SET summary_status = %s
+                        WHERE summary = %s
+                    """, (SummaryStatus.FAILED, SummaryStatus.NO_SUMMARY))
+                self._ensure_column(cursor, 'Links', 'summary_attempts', "INT NOT NULL DEFAULT 0")
+
+                # Create GuildSettings table for per-guild overrides of the config defaults
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS GuildSettings (
+                        guild_id BIGINT NOT NULL,
+                        setting_key VARCHAR(64) NOT NULL,
+                        setting_value VARCHAR(255) NOT NULL,
+                        updated_at DATETIME NOT NULL,
+                        PRIMARY KEY (guild_id, setting_key)
+                    ) ENGINE=InnoDB;
+                """)
+
+                # Create BackfillCheckpoints table so history imports can resume
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS BackfillCheckpoints (
+                        guild_id BIGINT NOT NULL,
+                        channel_id BIGINT NOT NULL,
+                        last_message_id BIGINT NOT NULL,
+                        updated_at DATETIME NOT NULL,
+                        PRIMARY KEY (guild_id, channel_id)
+                    ) ENGINE=InnoDB;
+                """)
+
+                # Create ResolvedUrls table shared by every process resolving short links and redirects
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS ResolvedUrls (
+                        url_hash BINARY(32) PRIMARY KEY,
+                        resolved_url VARCHAR(2048) NOT NULL,
+                        resolved_at DATETIME NOT NULL
+                    ) ENGINE=InnoDB;
+                """)
+
+                # Partition data by guild, rows from before this have guild_id 0 until adopted
+                for table in ('Links', 'ExcludedChannels', 'Jobs'):
+                    self._ensure_column(cursor, table, 'guild_id', "BIGINT NOT NULL DEFAULT 0")
+                self._ensure_index(cursor, 'Links', 'idx_links_guild_created', "(guild_id, deleted, creation_date, link_id)")
+                self._ensure_index(cursor, 'Links', 'idx_links_guild_page', "(guild_id, creation_date, link_id)")
+                self._ensure_index(cursor, 'ExcludedChannels', 'idx_excluded_guild', "(guild_id, channel_id)")
+                self._ensure_index(cursor, 'Jobs', 'idx_jobs_guild', "(guild_id, status)")
+
+                # At most one active version per URL. active_key is NULL for deleted rows,
+                # so the unique index only constrains active ones.
+                if self._ensure_column(cursor, 'Links', 'url_hash', "BINARY(32) NULL"):
+                    cursor.execute("UPDATE Links SET url_hash = UNHEX(SHA2(web_url, 256))")
+                self._ensure_column(cursor, 'Links', 'active_key', "TINYINT AS (IF(deleted, NULL, 1)) VIRTUAL")
+                if not self._index_exists(cursor, 'Links', 'uq_links_active_url'):
+                    # Retire older active duplicates left by earlier races before enforcing uniqueness
+                    cursor.execute("""
+                        UPDATE Links l
+                        JOIN (
+                            SELECT guild_id, url_hash, MAX(link_id) AS keep_id
+                            FROM Links
+                            WHERE deleted = FALSE
+                            GROUP BY guild_id, url_hash
+                            HAVING COUNT(*) > 1
+                        ) d ON l.guild_id = d.guild_id AND l.url_hash = d.url_hash
+                        SET l.deleted = TRUE
+                        WHERE l.deleted = FALSE AND l.link_id <> d.keep_id
+                    """)
+                    cursor.execute("CREATE UNIQUE INDEX uq_links_active_url ON Links (guild_id, url_hash, active_key)")
+                # Full-text index for !search
+                if not self._index_exists(cursor, 'Links', 'ft_links_text'):
+                    cursor.execute("CREATE FULLTEXT INDEX ft_links_text ON Links (web_url, summary)")
                 conn.commit()
             except Error as e:
-                print(f"Error creating tables: {e}")
+                logger.error("Error creating tables: %s", e)
                 conn.rollback()
 
+    def _ensure_column(self, cursor, table: str, column: str, definition: str) -> bool:
+        """Add a column to an existing table if it is missing. Returns True if it was added."""
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """, (table, column))
+        if cursor.fetchone()[0]:
+            return False
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        return True
+
+    def _index_exists(self, cursor, table: str, index: str) -> bool:
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        """, (table, index))
+        return cursor.fetchone()[0] > 0
+
+    def _ensure_index(self, cursor, table: str, index: str, columns: str) -> bool:
+        """Create an index on an existing table if it is missing. Returns True if it was created."""
+        if self._index_exists(cursor, table, index):
+            return False
+        cursor.execute(f"CREATE INDEX {index} ON {table} {columns}")
+        return True
+
+    def adopt_legacy_rows(self, guild_id: int) -> int:
+        """Assign rows saved before guild partitioning (guild_id 0) to a guild"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                adopted = 0
+                for table in ('Links', 'ExcludedChannels'):
+                    cursor.execute(f"UPDATE {table} SET guild_id = %s WHERE guild_id = 0", (guild_id,))
+                    adopted += cursor.rowcount
+                conn.commit()
+                return adopted
+            except Error as e:
+                logger.error("Error adopting legacy rows: %s", e)
+                conn.rollback()
+                return 0
+
+    def canonicalize_stored_urls(self, batch_size: int = 500) -> int:
+        """Rewrite links saved before URL canonicalization to their canonical URL and key.
+
+        When several active links share a canonical URL only the newest stays
+        active. Returns the number of links rewritten.
+        """
+        rewritten = 0
+        last_id = 0
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                while True:
+                    cursor.execute("""
+                        SELECT link_id, guild_id, web_url, deleted FROM Links
+                        WHERE link_id > %s
+                        ORDER BY link_id
+                        LIMIT %s
+                    """, (last_id, batch_size))
+                    rows = cursor.fetchall()
+                    if not rows:
+                        break
+                    last_id = rows[-1][0]
+                    for link_id, guild_id, web_url, deleted in rows:
+                        canonical = canonicalize_url(web_url)
+                        if canonical == web_url:
+                            continue
+                        url_hash = self._url_hash(canonical)
+                        if not deleted:
+                            # Keep the newest active copy of the canonical URL, retire the others
+                            cursor.execute("""
+                                SELECT 1 FROM Links
+                                WHERE guild_id = %s AND url_hash = %s AND deleted = FALSE AND link_id > %s
+                                LIMIT 1
+                            """, (guild_id, url_hash, link_id))
+                            deleted = cursor.fetchone() is not None
+                            if not deleted:
+                                cursor.execute("""
+                                    UPDATE Links SET deleted = TRUE
+                                    WHERE guild_id = %s AND url_hash = %s AND deleted = FALSE AND link_id < %s
+                                """, (guild_id, url_hash, link_id))
+                        cursor.execute("""
+                            UPDATE Links SET web_url = %s, url_hash = %s, deleted = %s
+                            WHERE link_id = %s
+                        """, (canonical, url_hash, bool(deleted), link_id))
+                        rewritten += 1
+                    conn.commit()
+                # Rewritten links bypassed the link cache
+                self._link_cache.clear()
+                return rewritten
+            except Error as e:
+                logger.error("Error canonicalizing stored URLs: %s", e)
+                conn.rollback()
+                return rewritten
+
     # Add category to save_link method
+    @instrumented
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
-    def save_link(self, web_url: str, summary: str, category: str) -> int:
-        """Save new link or update existing one"""
+    def save_link(self, guild_id: int, web_url: str, summary: str, category: str,
+                  summary_status: str = SummaryStatus.DONE) -> Optional[SaveResult]:
+        """Save a link as the active version of its URL, superseding the previous active version"""
+        web_url = canonicalize_url(web_url)
+        url_hash = self._url_hash(web_url)
         with self._get_connection() as conn:
             cursor = conn.cursor()
             try:
-                # Check for existing active link
+                # Retire the active version, LAST_INSERT_ID(link_id) hands its id back in lastrowid
                 cursor.execute("""
-                    SELECT link_id FROM Links 
-                    WHERE web_url = %s AND deleted = FALSE
-                    LIMIT 1
-                """, (web_url,))
-                existing = cursor.fetchone()
-                
-                if existing:
-                    # Mark existing as deleted
-                    cursor.execute("""
-                        UPDATE Links 
-                        SET deleted = TRUE 
-                        WHERE link_id = %s
-                    """, (existing[0],))
-                
-                # Insert new link
+                    UPDATE Links
+                    SET deleted = TRUE, link_id = LAST_INSERT_ID(link_id)
+                    WHERE guild_id = %s AND url_hash = %s AND deleted = FALSE
+                """, (guild_id, url_hash))
+                previous_link_id = cursor.lastrowid if cursor.rowcount > 0 else None
+
+                creation_date = datetime.now()
                 cursor.execute("""
-                    INSERT INTO Links (web_url, summary, category, creation_date, deleted)
-                    VALUES (%s, %s, %s, %s, %s)
-                """, (web_url, summary, category, datetime.now(), False))
-                
+                    INSERT INTO Links (guild_id, web_url, url_hash, summary, category, creation_date, deleted, summary_status)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """, (guild_id, web_url, url_hash, summary, category, creation_date, False, summary_status))
+
                 conn.commit()
-                return cursor.lastrowid
+                # Replaces the cached previous version of the URL
+                self._cache_link(guild_id, LinkRef(cursor.lastrowid, web_url, False, creation_date))
+                return SaveResult(cursor.lastrowid, previous_link_id)
             except Error as e:
-                print(f"Error saving link: {e}")
                 conn.rollback()
-                return -1
+                # A concurrent share of the same URL won the race, retrying supersedes its row
+                if e.errno in (errorcode.ER_DUP_ENTRY, errorcode.ER_LOCK_DEADLOCK):
+                    raise
+                logger.error("Error saving link: %s", e)
+                return None
 
+    @instrumented
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
-    def get_links_by_category(self) -> dict:
-        """Get all links grouped by category"""
+    def save_links_bulk(self, guild_id: int, links: list[Tuple[str, datetime]]) -> int:
+        """Insert (web_url, creation_date) pairs with pending summaries in one multi-row statement.
+
+        URLs that already have an active version are skipped rather than superseded.
+        Returns the number of links inserted.
+        """
+        if not links:
+            return 0
+        rows = [
+            (guild_id, canonicalize_url(web_url), self._url_hash(web_url), SummaryStatus.PENDING_TEXT, "other",
+             creation_date, False, SummaryStatus.PENDING)
+            for web_url, creation_date in links
+        ]
         with self._get_connection() as conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT category, web_url, summary, link_id
-                FROM Links 
+            cursor = conn.cursor()
+            try:
+                # A no-op update skips active URLs without hiding data errors the way INSERT IGNORE does,
+                # skipped rows count as unchanged, not affected
+                cursor.executemany("""
+                    INSERT INTO Links (guild_id, web_url, url_hash, summary, category, creation_date, deleted, summary_status)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE link_id = link_id
+                """, rows)
+                conn.commit()
+                return cursor.rowcount
+            except Error as e:
+                logger.error("Error bulk saving links: %s", e)
+                conn.rollback()
+                return 0
+
+    @instrumented
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
+    def get_pending_link_refs(self, guild_id: int, urls: list[str]) -> list[LinkRef]:
+        """Active links among `urls` that still wait for a summary"""
+        if not urls:
+            return []
+        hashes = [self._url_hash(url) for url in urls]
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {self.LINK_REF_COLUMNS} FROM Links
+                WHERE guild_id = %%s AND deleted = FALSE AND summary_status = %%s
+                AND url_hash IN (%s)
+                """ % ','.join(['%s'] * len(hashes)),
+                (guild_id, SummaryStatus.PENDING, *hashes))
+            return [LinkRef._make(row) for row in cursor.fetchall()]
+
+    @instrumented
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
+    def update_link_summary(self, link_id: int, summary: str, category: str, summary_status: str) -> bool:
+        """Fill in the summary of a link saved with a pending summary"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("""
+                    UPDATE Links
+                    SET summary = %s, category = %s, summary_status = %s,
+                        summary_attempts = summary_attempts + 1
+                    WHERE link_id = %s
+                """, (summary, category, summary_status, link_id))
+                conn.commit()
+                return cursor.rowcount > 0
+            except Error as e:
+                logger.error("Error updating link summary: %s", e)
+                conn.rollback()
+                return False
+
+    @instrumented
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
+    def get_links_needing_summary(self, max_attempts: int, limit: int = 100) -> list[Link]:
+        """Active links whose summary is still pending or failed and may be retried"""
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {self.LINK_COLUMNS} FROM Links
                 WHERE deleted = FALSE
+                AND summary_status IN (%s, %s)
+                AND summary_attempts < %s
                 ORDER BY creation_date DESC
-            """)
+                LIMIT %s
+            """, (SummaryStatus.PENDING, SummaryStatus.FAILED, max_attempts, limit))
+            return [Link._make(row) for row in cursor.fetchall()]
+
+    @instrumented
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
+    def get_links_by_category(self, guild_id: int, after: Optional[Tuple[datetime, int]] = None,
+                              limit: Optional[int] = None) -> dict:
+        """Get links grouped by category, optionally one keyset page older than `after` (creation_date, link_id)"""
+        query = """
+            SELECT category, web_url, summary, link_id, creation_date
+            FROM Links 
+            WHERE guild_id = %s AND deleted = FALSE"""
+        params = [guild_id]
+        query, params = self._add_keyset_page(query, params, after, limit)
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(query, params)
             categorized = {}
             for row in cursor.fetchall():
                 category = row['category']
@@ -120,68 +401,129 @@ class DBClient:
                 categorized[category].append(row)
             return categorized
         
-    def get_links_by_ids(self, link_ids: list[int]) -> list[Link]:
+    @instrumented
+    def get_links_by_ids(self, guild_id: int, link_ids: list[int]) -> list[Link]:
         with self._get_connection() as conn:
-            cursor = conn.cursor(dictionary=True)
-            cursor.execute("""
-                SELECT * FROM Links 
-                WHERE link_id IN (%s)
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {self.LINK_COLUMNS} FROM Links 
+                WHERE guild_id = %%s AND link_id IN (%s)
                 """ % ','.join(['%s']*len(link_ids)),
-                tuple(link_ids))
-            return [Link(**row) for row in cursor.fetchall()]
+                (guild_id, *link_ids))
+            return [Link._make(row) for row in cursor.fetchall()]
     
+    @instrumented
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
-    def get_link_by_url(self, url: str) -> Optional[Link]:
+    def get_link_by_url(self, guild_id: int, url: str) -> Optional[Link]:
         """Find an active link by its URL"""
         with self._get_connection() as conn:
-            cursor = conn.cursor(dictionary=True)
+            cursor = conn.cursor()
             try:
-                cursor.execute("""
-                    SELECT * FROM Links 
-                    WHERE web_url = %s 
+                cursor.execute(f"""
+                    SELECT {self.LINK_COLUMNS} FROM Links 
+                    WHERE guild_id = %s
+                    AND url_hash = %s 
                     AND deleted = FALSE
-                    ORDER BY creation_date DESC
                     LIMIT 1
-                """, (url,))
+                """, (guild_id, self._url_hash(url)))
                 result = cursor.fetchone()
-                return Link(**result) if result else None
+                return Link._make(result) if result else None
             except Error as e:
-                print(f"Error finding link by URL: {e}")
+                logger.error("Error finding link by URL: %s", e)
                 return None
     
+    @instrumented
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
-    def get_all_links(self, include_deleted: bool = False) -> list[Link]:
+    def _select_link_ref_by_url(self, guild_id: int, url: str) -> Optional[LinkRef]:
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"""
+                    SELECT {self.LINK_REF_COLUMNS} FROM Links
+                    WHERE guild_id = %s
+                    AND url_hash = %s
+                    AND deleted = FALSE
+                    LIMIT 1
+                """, (guild_id, self._url_hash(url)))
+                result = cursor.fetchone()
+                return LinkRef._make(result) if result else None
+            except Error as e:
+                logger.error("Error finding link by URL: %s", e)
+                return None
+
+    @instrumented
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
+    def get_all_links(self, guild_id: int, include_deleted: bool = False) -> list[Link]:
         """Retrieve all links, optionally including deleted ones."""
-        query = "SELECT * FROM Links"
-        params = []
+        query = f"SELECT {self.LINK_COLUMNS} FROM Links WHERE guild_id = %s"
+        params = [guild_id]
         if not include_deleted:
-            query += " WHERE deleted = %s"
+            query += " AND deleted = %s"
             params.append(False)
         query += " ORDER BY creation_date DESC"
         
         with self._get_connection() as conn:
-            cursor = conn.cursor(dictionary=True)
+            cursor = conn.cursor()
             cursor.execute(query, params)
-            return [Link(**row) for row in cursor.fetchall()]
+            return [Link._make(row) for row in cursor.fetchall()]
+
+    @instrumented
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
+    def get_link_refs_page(self, guild_id: int, include_deleted: bool = False,
+                           after: Optional[Tuple[datetime, int]] = None, limit: int = 15) -> list[LinkRef]:
+        """Get one keyset page of link refs, newest first, older than `after` (creation_date, link_id)"""
+        query = f"SELECT {self.LINK_REF_COLUMNS} FROM Links WHERE guild_id = %s"
+        params = [guild_id]
+        if not include_deleted:
+            query += " AND deleted = %s"
+            params.append(False)
+        query, params = self._add_keyset_page(query, params, after, limit)
 
-    def delete_link(self, link_id: int) -> bool:
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return [LinkRef._make(row) for row in cursor.fetchall()]
+
+    def _add_keyset_page(self, query: str, params: list, after: Optional[Tuple[datetime, int]],
+                         limit: Optional[int]) -> Tuple[str, list]:
+        """Continue a query after the (creation_date, link_id) cursor, newest first"""
+        if after is not None:
+            query += " AND (creation_date < %s OR (creation_date = %s AND link_id < %s))"
+            params += [after[0], after[0], after[1]]
+        query += " ORDER BY creation_date DESC, link_id DESC"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        return query, params
+
+    @instrumented
+    def delete_link(self, guild_id: int, link_id: int) -> bool:
         """Soft delete a link by marking deleted as True."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
             try:
+                cursor.execute("""
+                    SELECT web_url FROM Links
+                    WHERE guild_id = %s AND link_id = %s
+                    FOR UPDATE
+                """, (guild_id, link_id))
+                row = cursor.fetchone()
                 cursor.execute("""
                     UPDATE Links 
                     SET deleted = TRUE 
-                    WHERE link_id = %s
-                """, (link_id,))
+                    WHERE guild_id = %s AND link_id = %s
+                """, (guild_id, link_id))
                 conn.commit()
+                if row is not None:
+                    self._uncache_link(guild_id, row[0], link_id)
                 return cursor.rowcount > 0
             except Error as e:
-                print(f"Error deleting link: {e}")
+                logger.error("Error deleting link: %s", e)
                 conn.rollback()
                 return False
 
-    def restore_link(self, link_id: int) -> bool:
+    @instrumented
+    def restore_link(self, guild_id: int, link_id: int) -> bool:
         """Restore a soft-deleted link by marking deleted as False."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
@@ -189,20 +531,27 @@ class DBClient:
                 cursor.execute("""
                     UPDATE Links 
                     SET deleted = FALSE 
-                    WHERE link_id = %s
-                """, (link_id,))
+                    WHERE guild_id = %s AND link_id = %s
+                """, (guild_id, link_id))
                 conn.commit()
-                return cursor.rowcount > 0
+                restored = cursor.rowcount > 0
             except Error as e:
-                print(f"Error restoring link: {e}")
+                if e.errno == errorcode.ER_DUP_ENTRY:
+                    logger.warning("Cannot restore link %s, another version of its URL is active", link_id)
+                else:
+                    logger.error("Error restoring link: %s", e)
                 conn.rollback()
                 return False
+        if restored:
+            self._cache_restored_link(guild_id, link_id)
+        return restored
 
+    @instrumented
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
-    def get_recent_links(self, days_ago: int = None, limit: int = None) -> list[Link]:
-        query = """SELECT * FROM Links 
-                   WHERE deleted = FALSE"""
-        params = []
+    def get_recent_links(self, guild_id: int, days_ago: int = None, limit: int = None) -> list[Link]:
+        query = f"""SELECT {self.LINK_COLUMNS} FROM Links 
+                   WHERE guild_id = %s AND deleted = FALSE"""
+        params = [guild_id]
         
         if days_ago is not None:
             query += " AND creation_date >= DATE_SUB(CURRENT_TIMESTAMP, INTERVAL %s DAY)"
@@ -215,6 +564,266 @@ class DBClient:
             params.append(limit)
         
         with self._get_connection() as conn:
-            cursor = conn.cursor(dictionary=True)
+            cursor = conn.cursor()
             cursor.execute(query, params)
-            return [Link(**row) for row in cursor.fetchall()]
+            return [Link._make(row) for row in cursor.fetchall()]
+
+    @instrumented
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
+    def search_links(self, guild_id: int, query: str, limit: int = 15) -> list[LinkRef]:
+        terms = search_terms(query)
+        if not terms:
+            return []
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            # Any of the words matches, links with more of them rank first
+            cursor.execute(f"""
+                SELECT {self.LINK_REF_COLUMNS} FROM Links
+                WHERE guild_id = %s AND deleted = FALSE
+                AND MATCH (web_url, summary) AGAINST (%s IN NATURAL LANGUAGE MODE)
+                ORDER BY MATCH (web_url, summary) AGAINST (%s IN NATURAL LANGUAGE MODE) DESC, creation_date DESC
+                LIMIT %s
+            """, (guild_id, ' '.join(terms), ' '.join(terms), limit))
+            return [LinkRef._make(row) for row in cursor.fetchall()]
+
+    ### Guild settings and channel exclusions
+
+    @instrumented
+    def get_guild_settings(self, guild_id: int) -> dict[str, str]:
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT setting_key, setting_value FROM GuildSettings
+                    WHERE guild_id = %s
+                """, (guild_id,))
+                return dict(cursor.fetchall())
+        except Error as e:
+            logger.error("Error fetching guild settings: %s", e)
+            return {}
+
+    @instrumented
+    def set_guild_setting(self, guild_id: int, key: str, value: Optional[str]) -> bool:
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                if value is None:
+                    cursor.execute("""
+                        DELETE FROM GuildSettings
+                        WHERE guild_id = %s AND setting_key = %s
+                    """, (guild_id, key))
+                else:
+                    cursor.execute("""
+                        INSERT INTO GuildSettings (guild_id, setting_key, setting_value, updated_at)
+                        VALUES (%s, %s, %s, %s)
+                        ON DUPLICATE KEY UPDATE setting_value = VALUES(setting_value), updated_at = VALUES(updated_at)
+                    """, (guild_id, key, value, datetime.now()))
+                conn.commit()
+                return True
+        except Error as e:
+            logger.error("Error saving guild setting: %s", e)
+            return False
+
+    @instrumented
+    def add_excluded_channel(self, guild_id: int, channel_id: str) -> bool:
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO ExcludedChannels (guild_id, channel_id, created_at)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE channel_id=channel_id
+                """, (guild_id, channel_id, datetime.now()))
+                conn.commit()
+                return cursor.rowcount > 0
+        except Error as e:
+            logger.error("Error excluding channel: %s", e)
+            return False
+
+    @instrumented
+    def remove_excluded_channel(self, guild_id: int, channel_id: str) -> bool:
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    DELETE FROM ExcludedChannels 
+                    WHERE guild_id = %s AND channel_id = %s
+                """, (guild_id, channel_id))
+                conn.commit()
+                return cursor.rowcount > 0
+        except Error as e:
+            logger.error("Error unexcluding channel: %s", e)
+            return False
+
+    @instrumented
+    def get_excluded_channels(self, guild_id: int) -> list[str]:
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT channel_id FROM ExcludedChannels WHERE guild_id = %s", (guild_id,))
+                return [row[0] for row in cursor.fetchall()]
+        except Error as e:
+            logger.error("Error fetching excluded channels: %s", e)
+            return []
+
+    ### Jobs, not instrumented since idle workers poll them continuously
+
+    def enqueue_job(self, guild_id: int, job_type: str, payload: str, dedupe_key: Optional[str],
+                    available_at: datetime) -> bool:
+        now = datetime.now()
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT IGNORE INTO Jobs (guild_id, job_type, payload, status, dedupe_key, available_at, created_at, updated_at)
+                    VALUES (%s, %s, %s, 'queued', %s, %s, %s, %s)
+                """, (guild_id, job_type, payload, dedupe_key, available_at, now, now))
+                conn.commit()
+                return cursor.rowcount > 0
+        except Error as e:
+            logger.error("Error enqueueing %s job: %s", job_type, e)
+            return False
+
+    def claim_job(self, worker_id: str, lease_until: datetime, max_attempts: int) -> Optional[Job]:
+        now = datetime.now()
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                try:
+                    while True:
+                        cursor.execute("""
+                            SELECT job_id, job_type, payload, attempts FROM Jobs
+                            WHERE status IN ('queued', 'running') AND available_at <= %s
+                            ORDER BY available_at, job_id
+                            LIMIT 1
+                            FOR UPDATE SKIP LOCKED
+                        """, (now,))
+                        row = cursor.fetchone()
+                        if not row:
+                            conn.commit()
+                            return None
+                        if row['attempts'] < max_attempts:
+                            break
+                        # Its last attempt never finished, the worker running it died
+                        logger.error("Job %s (%s) moved to dead letter after %d attempts: lease expired",
+                                     row['job_id'], row['job_type'], row['attempts'])
+                        cursor.execute("""
+                            UPDATE Jobs
+                            SET status = 'dead', last_error = 'Lease expired', locked_by = NULL, dedupe_key = NULL, updated_at = %s
+                            WHERE job_id = %s
+                        """, (now, row['job_id']))
+                    cursor.execute("""
+                        UPDATE Jobs
+                        SET status = 'running', attempts = attempts + 1, locked_by = %s,
+                            available_at = %s, updated_at = %s
+                        WHERE job_id = %s
+                    """, (worker_id, lease_until, now, row['job_id']))
+                    conn.commit()
+                except Error:
+                    conn.rollback()
+                    raise
+                return Job(
+                    job_id=row['job_id'],
+                    job_type=row['job_type'],
+                    payload=json.loads(row['payload']),
+                    attempts=row['attempts'] + 1
+                )
+        except Error as e:
+            logger.error("Error claiming job: %s", e)
+            return None
+
+    def update_job(self, job_id: int, worker_id: str, **fields) -> Optional[int]:
+        assignments = ", ".join(f"{column} = %s" for column in fields)
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    UPDATE Jobs
+                    SET {assignments}, updated_at = %s
+                    WHERE job_id = %s AND locked_by = %s AND status = 'running'
+                """, (*fields.values(), datetime.now(), job_id, worker_id))
+                conn.commit()
+                return cursor.rowcount
+        except Error as e:
+            logger.error("Error updating job %s: %s", job_id, e)
+            return None
+
+    def recover_jobs(self) -> int:
+        now = datetime.now()
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    UPDATE Jobs
+                    SET status = 'queued', locked_by = NULL, updated_at = %s
+                    WHERE status = 'running' AND available_at <= %s
+                """, (now, now))
+                conn.commit()
+                return cursor.rowcount
+        except Error as e:
+            logger.error("Error recovering jobs: %s", e)
+            return 0
+
+    ### Backfill checkpoints and resolved URLs
+
+    @instrumented
+    def get_backfill_checkpoint(self, guild_id: int, channel_id: int) -> Optional[int]:
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT last_message_id FROM BackfillCheckpoints
+                    WHERE guild_id = %s AND channel_id = %s
+                """, (guild_id, channel_id))
+                row = cursor.fetchone()
+                return row[0] if row else None
+        except Error as e:
+            logger.error("Error fetching backfill checkpoint: %s", e)
+            return None
+
+    @instrumented
+    def save_backfill_checkpoint(self, guild_id: int, channel_id: int, message_id: int) -> bool:
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO BackfillCheckpoints (guild_id, channel_id, last_message_id, updated_at)
+                    VALUES (%s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE last_message_id = VALUES(last_message_id), updated_at = VALUES(updated_at)
+                """, (guild_id, channel_id, message_id, datetime.now()))
+                conn.commit()
+                return True
+        except Error as e:
+            logger.error("Error saving backfill checkpoint: %s", e)
+            return False
+
+    @instrumented
+    def get_resolved_url(self, url: str, not_before: datetime) -> Optional[str]:
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT resolved_url FROM ResolvedUrls
+                    WHERE url_hash = %s AND resolved_at > %s
+                """, (self._url_hash(url), not_before))
+                row = cursor.fetchone()
+                return row[0] if row else None
+        except Error as e:
+            logger.error("Error fetching resolved URL: %s", e)
+            return None
+
+    @instrumented
+    def save_resolved_url(self, url: str, resolved: str) -> bool:
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    INSERT INTO ResolvedUrls (url_hash, resolved_url, resolved_at)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE resolved_url = VALUES(resolved_url), resolved_at = VALUES(resolved_at)
+                """, (self._url_hash(url), resolved, datetime.now()))
+                conn.commit()
+                return True
+        except Error as e:
+            logger.error("Error saving resolved URL: %s", e)
+            return False
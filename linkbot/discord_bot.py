@@ -1,99 +1,213 @@
 # discord_bot.py
+import argparse
 import asyncio
 import discord
+import logging
 import re
 from discord.ext import commands
 from typing import List, Optional
-from linkbot.config import DISCORD_TOKEN, LINKS_CHANNEL, COMMAND_CHANNEL, PRODUCTS_CHANNEL, DB_CONFIG, CONTEXT_MESSAGE_COUNT
+from linkbot.config import (
+    DISCORD_TOKEN, DB_CONFIG, LEGACY_GUILD_ID, GUILD_SETTINGS_CACHE_TTL,
+    JOB_WORKER_COUNT, JOB_POLL_INTERVAL, SUMMARY_MAX_ATTEMPTS, SUMMARY_BACKFILL_INTERVAL,
+    JOB_WORKER_ID, JOB_VISIBILITY_TIMEOUT, JOB_MAX_ATTEMPTS, JOB_RETRY_BASE_DELAY, RUN_JOB_WORKERS,
+    RUN_SUMMARY_SWEEP, SHARD_COUNT, SHARD_IDS, EXCLUSION_CACHE_TTL, MEMBER_CACHE_SIZE, MEMBER_CACHE_TTL, parse_shard_ids,
+    DISPLAY_LINKS_PAGE_SIZE, CATEGORIZED_LINKS_PAGE_SIZE, LINK_PAGE_TIMEOUT,
+    BACKFILL_PAGE_SIZE, RESOLVE_REDIRECTS, REDIRECT_CACHE_SIZE, REDIRECT_CACHE_TTL,
+    CANONICALIZE_STORED_URLS, METRICS_HOST, METRICS_PORT, TRACING_FILE, TRACING_OTLP_ENDPOINT
+)
+from linkbot.announcer import Announcer
+from linkbot.backfill import BackfillService, parse_since
 from linkbot.channel_exclusion import ChannelExclusionService
-from linkbot.database import DBClient
+from linkbot.channel_resolver import ChannelResolver
+from linkbot.guild_settings import GuildSettingsService
+from linkbot.job_queue import JobQueue
+from linkbot.job_worker import JobWorker
 from linkbot.openai_client import OpenAIClient
+from linkbot.storage import StorageBackend, create_db_client
 from linkbot.web_scraper import WebScraper
-from linkbot.models import Link
+from linkbot.models import BackfillProgress, Link, LinkRef
 from linkbot.backtick_scrubber import BacktickScrubber
 from linkbot.link_categorizer import LinkCategorizer
-
-class LinkBot(commands.Bot):
-    def __init__(self, db_client: DBClient, ai_client: OpenAIClient):
-        intents = discord.Intents.default()
+from linkbot.link_pages import Cursor, LinkPageView
+from linkbot.logging_setup import log_payload, setup_logging
+from linkbot.lru_cache import LRUCache
+from linkbot.metrics import start_metrics_server
+from linkbot.tracing import instrument_discord_http, set_attributes, setup_tracing, traced
+from linkbot.url_canonicalizer import extract_urls
+from linkbot.url_resolver import RedirectResolver
+
+logger = logging.getLogger(__name__)
+context_logger = logging.getLogger('linkbot.context')
+
+class LinkBot(commands.AutoShardedBot):
+    def __init__(self, db_client: StorageBackend, ai_client: OpenAIClient, run_job_workers: bool = True,
+                 shard_count: Optional[int] = None, shard_ids: Optional[List[int]] = None,
+                 metrics_port: Optional[int] = METRICS_PORT, run_summary_sweep: bool = RUN_SUMMARY_SWEEP):
+        # Only subscribe to what the bot reads, no members intent and no member cache or chunking
+        intents = discord.Intents.none()
+        intents.guilds = True
+        intents.guild_messages = True
         intents.message_content = True
-        intents.reactions = True
-        intents.members = True
-        super().__init__(command_prefix='!', intents=intents)
+        intents.guild_reactions = True
+        super().__init__(
+            command_prefix='!',
+            intents=intents,
+            member_cache_flags=discord.MemberCacheFlags.none(),
+            chunk_guilds_at_startup=False,
+            shard_count=shard_count,
+            shard_ids=shard_ids
+        )
+        instrument_discord_http(self.http)
         self.db = db_client
         self.ai = ai_client
         self.scraper = WebScraper()
-        self.exclusion_service = ChannelExclusionService(db_client)
+        self.url_resolver = RedirectResolver(db_client, RESOLVE_REDIRECTS, REDIRECT_CACHE_SIZE, REDIRECT_CACHE_TTL)
+        self.exclusion_service = ChannelExclusionService(db_client, cache_ttl=EXCLUSION_CACHE_TTL)
+        self.settings = GuildSettingsService(db_client, cache_ttl=GUILD_SETTINGS_CACHE_TTL)
         self.categorizer = LinkCategorizer()
+        self.member_cache = LRUCache(MEMBER_CACHE_SIZE, ttl=MEMBER_CACHE_TTL, name='members')
+        self.channels = ChannelResolver()
+        self.job_queue = JobQueue(
+            db_client,
+            worker_id=JOB_WORKER_ID,
+            visibility_timeout=JOB_VISIBILITY_TIMEOUT,
+            max_attempts=JOB_MAX_ATTEMPTS,
+            retry_base_delay=JOB_RETRY_BASE_DELAY
+        )
+        self.job_worker = JobWorker(self, self.job_queue, JOB_WORKER_COUNT, JOB_POLL_INTERVAL)
+        self.announcer = Announcer(self)
+        self.run_job_workers = run_job_workers
+        self.run_summary_sweep = run_summary_sweep
+        self._backfill_task: Optional[asyncio.Task] = None
+        self.metrics_port = metrics_port
+        self._metrics_runner = None
+        self.history_backfill = BackfillService(db_client, self.job_queue, self.url_resolver, BACKFILL_PAGE_SIZE)
+        # Running !backfill imports by channel ID
+        self._history_backfills: dict[int, asyncio.Task] = {}
     
     ### Discord SDK
+    async def setup_hook(self):
+        if self.metrics_port:
+            try:
+                self._metrics_runner = await start_metrics_server(METRICS_HOST, self.metrics_port)
+            except OSError as e:
+                # Another process on this host serves the port, keep running without metrics
+                logger.error("Cannot serve metrics on %s:%s: %s", METRICS_HOST, self.metrics_port, e)
+        # One process sweeps for missing summaries, every other process would queue the same links
+        if self.run_summary_sweep:
+            self._backfill_task = asyncio.create_task(self._summary_backfill_loop())
+        # Gateway-only processes leave the jobs to `python -m linkbot worker`
+        if self.run_job_workers:
+            self.job_worker.start()
+
+    async def close(self):
+        if self._backfill_task:
+            self._backfill_task.cancel()
+        for task in self._history_backfills.values():
+            task.cancel()
+        await self.job_worker.stop()
+        await self.announcer.stop()
+        if self._metrics_runner:
+            await self._metrics_runner.cleanup()
+        await super().close()
+
     async def on_ready(self):
-        print(f'Logged in as {self.user}')
+        logger.info("Logged in as %s (shards: %s of %s)", self.user, sorted(self.shards), self.shard_count)
+
+    async def on_shard_ready(self, shard_id: int):
+        logger.info("Shard %s ready", shard_id)
 
+    @traced('discord')
     async def on_message(self, message):
-        if message.author == self.user:
+        if message.author == self.user or message.guild is None:
             return
+        set_attributes(**{'discord.guild_id': str(message.guild.id), 'discord.channel_id': str(message.channel.id)})
 
-        if message.channel.name == COMMAND_CHANNEL:
+        if self.channels.matches(message.channel, self.settings.get(message.guild.id).command_channel):
             await self.process_command(message)
         else:
             await self.process_shared_links(message)
     
+    @traced('discord')
     async def on_raw_reaction_add(self, payload):
         """Handle reaction add events""" # TODO: Try to rework this and potentially _extract_link_id_from_message
         try:
             # Only process in links channel
             channel = self.get_channel(payload.channel_id)
-            if channel.name != LINKS_CHANNEL:
+            if payload.guild_id is None or not self.channels.matches(channel, self.settings.get(payload.guild_id).links_channel):
                 return
 
             # Only process red X emoji
             if str(payload.emoji) != '❌':
                 return
 
-            # Get the message and user
+            # Permission check - only allow users with Manage Messages permission
+            user = await self._resolve_member(channel.guild, payload)
+            if not user or not user.guild_permissions.manage_messages:
+                return
+
+            # Get the message
             try:
                 message = await channel.fetch_message(payload.message_id)
-                user = await self.fetch_user(payload.user_id)
             except discord.NotFound:
                 return
 
-            # Permission check - only allow users with Manage Messages permission
-            member = channel.guild.get_member(payload.user_id)
-            if not member or not member.guild_permissions.manage_messages:
+            # Extract the announced URLs from the message
+            urls = self._extract_urls_from_message(message)
+            if not urls:
                 return
-
-            # Extract URL from message
-            url = self._extract_url_from_message(message)
-            if not url:
-                return
-            print(url)
-            # Find matching link in database
-            link = self.db.get_link_by_url(url)
-            if not link:
+            # Find matching links in database
+            links = [link for link in (self.db.get_link_ref_by_url(payload.guild_id, url) for url in urls) if link]
+            if not links:
                 await channel.send(f"{user.mention} Could not find matching link in database!", delete_after=5)
                 return
 
             # Delete from database
-            success = self.db.delete_link(link.link_id)
-            if not success:
+            deleted = [self.db.delete_link(payload.guild_id, link.link_id) for link in links]
+            if not all(deleted):
                 await channel.send(f"{user.mention} Failed to delete link from database!", delete_after=5)
                 return
 
             # Delete the message
             try:
                 await message.delete()
-                await channel.send(f"{user.mention} Link successfully deleted!", delete_after=5)
+                done = "Link successfully deleted!" if len(links) == 1 else f"{len(links)} links successfully deleted!"
+                await channel.send(f"{user.mention} {done}", delete_after=5)
             except discord.Forbidden:
                 await channel.send(f"{user.mention} I don't have permission to delete messages!", delete_after=5)
             except discord.HTTPException as e:
                 await channel.send(f"{user.mention} Failed to delete message: {str(e)}", delete_after=5)
-        except Exception as e:
-            print(f"Error processing reaction: {str(e)}")
+        except Exception:
+            logger.exception("Error processing reaction")
             channel = self.get_channel(payload.channel_id)
             if channel:
                 await channel.send("An error occurred while processing that reaction.", delete_after=5)
 
+    async def on_guild_channel_create(self, channel):
+        self.channels.invalidate(channel.guild.id)
+
+    async def on_guild_channel_update(self, before, after):
+        if before.name != after.name:
+            self.channels.invalidate(after.guild.id)
+
+    async def on_guild_channel_delete(self, channel):
+        self.channels.invalidate(channel.guild.id)
+
+    async def on_guild_remove(self, guild):
+        self.channels.invalidate(guild.id)
+
+    async def _resolve_member(self, guild: discord.Guild, payload) -> Optional[discord.Member]:
+        """Get the reacting member from the payload, the member LRU or the API"""
+        key = (payload.guild_id, payload.user_id)
+        member = payload.member or self.member_cache.get(key)
+        if member is None:
+            try:
+                member = await guild.fetch_member(payload.user_id)
+            except (discord.NotFound, discord.Forbidden):
+                return None
+        self.member_cache.set(key, member)
+        return member
+
     ### Logic
 
     async def get_channel_context(self, channel, limit: int) -> List[str]:
@@ -103,59 +217,52 @@ class LinkBot(commands.Bot):
             messages.append(f"{message.author.display_name}: {message.content}")
         return messages[::-1]  # Return in chronological order
 
+    @traced('discord')
     async def process_shared_links(self, message):
         # Check if channel is excluded
-        if str(message.channel.id) in self.exclusion_service.get_excluded_channels():
+        if self.exclusion_service.is_excluded(message.guild.id, str(message.channel.id)):
             return
         
-        urls = re.findall(r'https?://\S+', message.content)
+        urls = extract_urls(message.content)
         if not urls:
             return
 
-        links_channel = discord.utils.get(message.guild.channels, name=LINKS_CHANNEL)
+        settings = self.settings.get(message.guild.id)
+        links_channel = self.channels.resolve(message.guild, settings.links_channel)
 
         if not links_channel:
             return
         
-        # Send loading messages
-        loading_messages = []
-        for url in urls:
-            print(url)
-            loading_messages.append(await links_channel.send(f"Loading data for <{url}>..."))
-        
-        async with links_channel.typing():
-            for url in urls:
-                try:
-                    content = await self.scraper.get_web_content(url)
-                    summary, category = await self.ai.generate_summary(content) if content else ("No summary available", "other")
-                    
-                    # Save/update link
-                    link_id = self.db.save_link(url, summary, category)
-                    
-                    if link_id != -1:
-                        # Check if this was an update
-                        existing_link = self.db.get_link_by_url(url)
-                        if existing_link and not existing_link.deleted:
-                            message_text = f"Duplicate link updated <{url}> from {message.author.mention}"
-                        else:
-                            message_text = f"New link saved <{url}> from {message.author.mention}"
-                            
-                        await links_channel.send(message_text)
-
-                        # If it is a product or service send in proudcts channel
-                        products_channel = discord.utils.get(message.guild.channels, name=PRODUCTS_CHANNEL)
-                        if products_channel:
-                            products_channel.send(f"New product saved <{url}>")
-                            
-                except Exception as e:
-                    print(f"Error processing link: {str(e)}")
-                    await links_channel.send(
-                        f"New link saved <{url}> from {message.author.mention}"
-                    )
-            # Remove loading messages
-            for loading_message in loading_messages:
-                await loading_message.delete()
-
+        products_channel = self.channels.resolve(message.guild, settings.products_channel)
+
+        # Record the links as one durable job, a worker saves them and announces them in one status message
+        self.job_queue.enqueue('ingest', {
+            'guild_id': message.guild.id,
+            'urls': urls,
+            'author_mention': message.author.mention,
+            'channel_id': links_channel.id,
+            'products_channel_id': products_channel.id if products_channel else None
+        }, dedupe_key=f"ingest:{message.id}", guild_id=message.guild.id)
+        if self.run_job_workers:
+            self.job_worker.notify()
+
+    async def _summary_backfill_loop(self):
+        """Periodically re-enqueue links whose summary is missing"""
+        while True:
+            await asyncio.sleep(SUMMARY_BACKFILL_INTERVAL)
+            try:
+                for link in self.db.get_links_needing_summary(SUMMARY_MAX_ATTEMPTS):
+                    self.job_queue.enqueue('summarize', {
+                        'guild_id': link.guild_id,
+                        'link_id': link.link_id,
+                        'url': link.web_url
+                    }, dedupe_key=f"summarize:{link.link_id}", guild_id=link.guild_id)
+                if self.run_job_workers:
+                    self.job_worker.notify()
+            except Exception:
+                logger.exception("Error re-enqueueing summaries")
+
+    @traced('discord')
     async def process_command(self, message):
         content = message.content.lower()
         
@@ -166,7 +273,7 @@ class LinkBot(commands.Bot):
                 # General help
                 None: """
 **Reaction Commands:**
-❌      -   Soft-deletes link from database and removes from #links.
+❌      -   Soft-deletes the links of an announcement and removes it from #links.
 
 **Available commands:**
 
@@ -176,12 +283,18 @@ class LinkBot(commands.Bot):
 **--- data manipulation ---**
 `!categorized-links`      -   Get all active links grouped by categories.
 `!display-links [-d]`     -   Displays all non-deleted links. Add -d flag to get deleted links as well.
+`!search <words>`         -   Find links whose URL or summary contains the words.
 `!restore <link_id>`      -   Restores deleted link by link_id. Get from !display-links -d
+`!backfill <#channel> [since]` - Import links from a channel's history.
 
 **--- exclude channel ---**
 `!exclude <channel_id>`   -   Exclude a channel id.
 `!list-excluded`          -   List excluded channel ids.
-`!unexclude <channel_id>` -   Unexclude a channel id.""",
+`!unexclude <channel_id>` -   Unexclude a channel id.
+
+**--- server settings ---**
+`!settings`               -   Show this server's settings.
+`!set <key> [value]`      -   Change a setting, or reset it without a value.""",
 
                 # Core commands
                 'help': """**Command Help**: `!help [command]`
@@ -191,8 +304,9 @@ class LinkBot(commands.Bot):
 
                 # Data management commands
                 'categorized-links': """**Command Help**: `!categorized-links`
-- Displays active links organized by category
+- Displays active links organized by category, newest first
 - Shows link ID, URL, and summary preview
+- Use the buttons to move between pages
 - Format: Category header followed by list items
 - Example: `!categorized-links`""",
 
@@ -200,8 +314,15 @@ class LinkBot(commands.Bot):
 - Lists stored links with their status
 - Add `-d` flag to include deleted links
 - Shows link ID, URL, and deletion status
+- Use the buttons to move between pages
 - Example: `!display-links` or `!display-links -d`""",
 
+                'search': """**Command Help**: `!search <words>`
+- Full-text search over link URLs and summaries
+- Links matching more of the words are listed first
+- Shows link ID, URL, and status of up to 15 links
+- Example: `!search postgres indexing`""",
+
                 'delete': """**Command Help**: `!delete <link_id>`
 - Soft-deletes specified link (marks as deleted)
 - Requires valid link ID from !display-links
@@ -214,6 +335,13 @@ class LinkBot(commands.Bot):
 - Returns link to active status
 - Example: `!restore 42`""",
 
+                'backfill': """**Command Help**: `!backfill <#channel> [since]`
+- Imports links shared in a channel's history, requires Manage Server permission
+- Optional start date in YYYY-MM-DD format
+- Summaries are generated in the background, progress is shown in one message
+- Running it again resumes after the last imported message
+- Example: `!backfill #resources 2024-01-01`""",
+
                 # Channel control commands
                 'exclude': """**Command Help**: `!exclude <channel_id>`
 - Adds channel to exclusion list
@@ -230,7 +358,19 @@ class LinkBot(commands.Bot):
 - Removes channel from exclusion list
 - Requires existing excluded channel ID
 - Re-enables link scanning in channel
-- Example: `!unexclude 123456789`"""
+- Example: `!unexclude 123456789`""",
+
+                # Server settings commands
+                'settings': """**Command Help**: `!settings`
+- Shows the settings used in this server
+- Unset values fall back to the bot's defaults
+- Example: `!settings`""",
+
+                'set': """**Command Help**: `!set <key> [value]`
+- Changes a setting for this server, requires Manage Server permission
+- Keys: links_channel, command_channel, products_channel, context_message_count
+- Channels can be given by name or ID, omit the value to reset to the default
+- Example: `!set links_channel links` or `!set context_message_count`"""
             }
 
             response = help_responses.get(command, help_responses[None])
@@ -242,45 +382,72 @@ class LinkBot(commands.Bot):
 
         if content.startswith("!exclude"):
             channel_id = self._extract_channel_id(message.content)
-            if channel_id and self.exclusion_service.add_excluded_channel(channel_id):
+            if channel_id and self.exclusion_service.add_excluded_channel(message.guild.id, channel_id):
                 await message.channel.send(f"Channel <#{channel_id}> excluded from link scanning")
             return
         
         if content.startswith("!unexclude"):
             channel_id = self._extract_channel_id(message.content)
-            if channel_id and self.exclusion_service.remove_excluded_channel(channel_id):
+            if channel_id and self.exclusion_service.remove_excluded_channel(message.guild.id, channel_id):
                 await message.channel.send(f"Channel <#{channel_id}> removed from exclusion list")
             return
         
         if content.startswith("!list-excluded"):
-            excluded = self.exclusion_service.get_excluded_channels()
+            excluded = self.exclusion_service.get_excluded_channels(message.guild.id)
             response = "**Excluded Channels**:\n" + "\n".join(
                 [f"- <#{cid}>" for cid in excluded] or ["None"]
             )
             await message.channel.send(response)
             return
         
-        if content.startswith("!categorized-links"):
-            links = self.db.get_links_by_category()
-            response = self.categorizer.format_categorized(links)
+        if content.startswith("!settings"):
+            settings = self.settings.get(message.guild.id)
+            response = "**Server Settings**:\n" + "\n".join(
+                f"- `{key}`: {getattr(settings, key) or 'not set'}" for key in self.settings.DEFAULTS
+            )
             await message.channel.send(response)
             return
+
+        if content == "!set" or content.startswith("!set "):
+            if not message.author.guild_permissions.manage_guild:
+                await message.channel.send("You need the Manage Server permission to change settings.")
+                return
+            parts = message.content.split(maxsplit=2)
+            key = parts[1].lower() if len(parts) > 1 else None
+            value = parts[2].strip() if len(parts) > 2 else None
+            if key and self.settings.set(message.guild.id, key, value):
+                await message.channel.send(f"Setting `{key}` {'set to ' + value if value else 'reset to default'}")
+            else:
+                await message.channel.send("Invalid setting. Use: `!set <key> [value]`, see `!help set`")
+            return
+
+        if content.startswith("!categorized-links"):
+            await self._send_paged(message, lambda after: self._categorized_links_page(message.guild.id, after))
+            return
         
         # Handle !display-links
         if content.startswith("!display-links"):
             include_deleted = '-d' in message.content.split()
-            links = self.db.get_all_links(include_deleted=include_deleted)
-            response = self._format_display_links(links)
-            await message.channel.send(response)
+            await self._send_paged(message, lambda after: self._display_links_page(message.guild.id, include_deleted, after))
             return
         
+        # Handle !search
+        if content == "!search" or content.startswith("!search "):
+            query = message.content.split(maxsplit=1)[1] if len(message.content.split(maxsplit=1)) > 1 else ""
+            if not query.strip():
+                await message.channel.send("Invalid syntax. Use: `!search <words>`")
+                return
+            links = self.db.search_links(message.guild.id, query)
+            await message.channel.send(self._format_display_links(links))
+            return
+
         # Handle !delete
         if content.startswith("!delete"):
             link_id = self._extract_link_id(message.content)
             if link_id is None:
                 await message.channel.send("Invalid syntax. Use: `!delete <link_id>`")
                 return
-            success = self.db.delete_link(link_id)
+            success = self.db.delete_link(message.guild.id, link_id)
             response = f"Link {link_id} {'deleted' if success else 'not found'}"
             await message.channel.send(response)
             return
@@ -291,14 +458,34 @@ class LinkBot(commands.Bot):
             if link_id is None:
                 await message.channel.send("Invalid syntax. Use: `!restore <link_id>`")
                 return
-            success = self.db.restore_link(link_id)
+            success = self.db.restore_link(message.guild.id, link_id)
             response = f"Link {link_id} {'restored' if success else 'not found'}"
             await message.channel.send(response)
             return
         
+        # Handle !backfill
+        if content.startswith("!backfill"):
+            await self._start_history_backfill(message)
+            return
+
+        # Free-form questions go through the AI pipeline, on a worker process when running gateway-only
+        author = f"{message.author} ({message.author.id})"
+        if not self.run_job_workers:
+            self.job_queue.enqueue('command', {
+                'guild_id': message.guild.id,
+                'channel_id': message.channel.id,
+                'content': message.content,
+                'author': author
+            }, dedupe_key=f"command:{message.id}", guild_id=message.guild.id)
+            return
+
+        await self.answer_query(message.guild.id, message.channel, message.content, author)
+
+    async def answer_query(self, guild_id: int, channel, query: str, author: str):
+        """Answer a free-form request in the command channel, optionally using stored links"""
         try:
-            async with message.channel.typing():  # Show typing in command channel
-                classification = await self.ai.classify_command(message.content)
+            async with channel.typing():  # Show typing in command channel
+                classification = await self.ai.classify_command(query)
                 
                 if not isinstance(classification, dict):
                     classification = {"command_type": "NONE"}
@@ -307,58 +494,81 @@ class LinkBot(commands.Bot):
                 timeframe_days = classification.get("timeframe_days")
                 max_results = classification.get("max_results")
 
-                print(f"\n{' AI Context Package ':=^80}")
-                print(f"Channel: {message.channel} ({message.channel.id})")
-                print(f"Author:  {message.author} ({message.author.id})")
-                print(f"Command: {message.content}")
-                print(f"Classification: {classification}")
+                context_logger.debug("AI request in channel %s from %s: %s, classified as %s",
+                                     channel.id, author, query, classification)
 
                 if command_type == "NONE":
                     # Get adjustable number of context messages from config
-                    context_messages = []
-                    if message.channel.name == COMMAND_CHANNEL:
-                        context_messages = await self.get_channel_context(
-                            message.channel,
-                            limit=CONTEXT_MESSAGE_COUNT
-                        )
-                    response = await self.ai.generate_response(message.content, context_messages)
+                    context_messages = await self.get_channel_context(
+                        channel,
+                        limit=self.settings.get(guild_id).context_message_count
+                    )
+                    response = await self.ai.generate_response(query, context_messages)
                 else:
                     links = self.db.get_recent_links(
+                        guild_id,
                         days_ago=timeframe_days,
                         limit=max_results
                     )
-                    print(f"Found {len(links)} relevant links:")
-                    for link in links:
-                        print(f"- [ID: {link.link_id}] {link.web_url}")
+                    context_logger.debug("Found %d relevant links: %s", len(links), [link.link_id for link in links])
 
                     if not links:
                         response = "No relevant links found in my records."
                     else:
                         try:
-                            context = await self._build_command_context(command_type, links, message.content)
-                            print("\nContext sent to AI:")
-                            for idx, item in enumerate(context, 1):
-                                print(f"\nContext Item {idx}:")
-                                print(f"{'-'*40}")
-                                print(item.strip())
-                                print(f"{'-'*40}")
-                            response = await self.ai.generate_response(message.content, context)
-                        except Exception as e:
-                            print(f"Context building failed: {str(e)}")
+                            context = await self._build_command_context(command_type, links, query)
+                            log_payload(context_logger, "Context sent to AI", context)
+                            response = await self.ai.generate_response(query, context)
+                        except Exception:
+                            logger.exception("Context building failed")
                             response = "Error processing your request."
 
                 # Split long messages into Discord-friendly chunks
                 for chunk in self.split_message(response):
-                    await message.channel.send(chunk)
+                    await channel.send(chunk)
 
-        except Exception as e:
-            print(f"Command processing error: {str(e)}")
-            await message.channel.send("⚠️ An error occurred while processing your request.")
+        except Exception:
+            logger.exception("Command processing error")
+            await channel.send("⚠️ An error occurred while processing your request.")
 
-    def _get_links_for_command(self, classification: dict) -> list[Link]:
+    async def _send_paged(self, message, fetch_page):
+        """Send the first page of a listing, with page buttons when there is more than one page"""
+        content, next_cursor = fetch_page(None)
+        if next_cursor is None:
+            await message.channel.send(content)
+            return
+        view = LinkPageView(fetch_page, message.author.id, next_cursor, timeout=LINK_PAGE_TIMEOUT)
+        view.message = await message.channel.send(content, view=view)
+
+    def _display_links_page(self, guild_id: int, include_deleted: bool, after: Optional[Cursor]) -> tuple[str, Optional[Cursor]]:
+        # Fetch one extra row to know whether there is a next page
+        links = self.db.get_link_refs_page(guild_id, include_deleted, after, DISPLAY_LINKS_PAGE_SIZE + 1)
+        next_cursor = None
+        if len(links) > DISPLAY_LINKS_PAGE_SIZE:
+            links = links[:DISPLAY_LINKS_PAGE_SIZE]
+            next_cursor = (links[-1].creation_date, links[-1].link_id)
+        return self._format_display_links(links), next_cursor
+
+    def _categorized_links_page(self, guild_id: int, after: Optional[Cursor]) -> tuple[str, Optional[Cursor]]:
+        # Fetch one extra row to know whether there is a next page
+        categorized = self.db.get_links_by_category(guild_id, after, CATEGORIZED_LINKS_PAGE_SIZE + 1)
+        rows = sorted(
+            (row for rows in categorized.values() for row in rows),
+            key=lambda row: (row['creation_date'], row['link_id']),
+            reverse=True
+        )
+        next_cursor = None
+        if len(rows) > CATEGORIZED_LINKS_PAGE_SIZE:
+            extra = rows[CATEGORIZED_LINKS_PAGE_SIZE]
+            categorized[extra['category']].remove(extra)
+            last = rows[CATEGORIZED_LINKS_PAGE_SIZE - 1]
+            next_cursor = (last['creation_date'], last['link_id'])
+        return self.categorizer.format_categorized(categorized), next_cursor
+
+    def _get_links_for_command(self, guild_id: int, classification: dict) -> list[Link]:
         days = classification.get('timeframe_days')
         limit = classification.get('max_results')
-        return self.db.get_recent_links(days_ago=days, limit=limit)
+        return self.db.get_recent_links(guild_id, days_ago=days, limit=limit)
 
     async def _build_command_context(self, command_type: str, links: list[Link], query: str) -> list[str]:
         # link_ids = [str(link.link_id) for link in links]
@@ -394,6 +604,48 @@ class LinkBot(commands.Bot):
             )
         return context
 
+    async def _start_history_backfill(self, message):
+        if not message.author.guild_permissions.manage_guild:
+            await message.channel.send("You need the Manage Server permission to backfill a channel.")
+            return
+        channel_id = self._extract_channel_id(message.content)
+        channel = message.guild.get_channel(int(channel_id)) if channel_id else None
+        if channel is None:
+            await message.channel.send("Invalid syntax. Use: `!backfill <#channel> [YYYY-MM-DD]`")
+            return
+        since = None
+        parts = message.content.split()
+        if len(parts) > 2:
+            try:
+                since = parse_since(parts[2])
+            except ValueError:
+                await message.channel.send("Invalid date. Use: `!backfill <#channel> [YYYY-MM-DD]`")
+                return
+        if channel.id in self._history_backfills:
+            await message.channel.send(f"A backfill of <#{channel.id}> is already running")
+            return
+
+        status = await message.channel.send(f"Backfilling <#{channel.id}>...")
+
+        async def report(progress: BackfillProgress):
+            if self.run_job_workers:
+                self.job_worker.notify()
+            try:
+                await status.edit(content=f"Backfill of <#{channel.id}>: {progress}")
+            except discord.HTTPException as e:
+                logger.warning("Error updating backfill progress: %s", e)
+
+        async def run():
+            try:
+                await self.history_backfill.run(message.guild.id, channel, since, on_progress=report)
+            except Exception:
+                logger.exception("Error backfilling channel %s", channel.id)
+                await message.channel.send(f"Backfill of <#{channel.id}> stopped, run it again to resume")
+            finally:
+                self._history_backfills.pop(channel.id, None)
+
+        self._history_backfills[channel.id] = asyncio.create_task(run())
+
     def _extract_channel_id(self, text: str) -> Optional[str]:
         match = re.search(r"<#(\d+)>", text)
         return match.group(1) if match else None
@@ -405,20 +657,10 @@ class LinkBot(commands.Bot):
                 return int(part)
         return None
     
-    def _extract_url_from_message(self, message: discord.Message) -> Optional[str]:
-        """Extract URL from message content, handling > termination"""
-        # Look for URL in message content
-        match = re.search(r'https?://[^\s>]+', message.content)
-        if not match:
-            return None
-        
-        url = match.group(0)
-        
-        # Remove trailing > if present
-        if url.endswith('>'):
-            url = url[:-1]
-        
-        return url
+    def _extract_urls_from_message(self, message: discord.Message) -> list[str]:
+        """Extract the URLs of a status message's embeds, or of a plain text announcement, in canonical form"""
+        embed_urls = [embed.url for embed in message.embeds if embed.url]
+        return extract_urls(" ".join(embed_urls)) if embed_urls else extract_urls(message.content)[:1]
 
     def split_message(self, text: str, max_len: int = 2000) -> list[str]:
         """Split text into chunks that respect word boundaries and Discord's message limits"""
@@ -435,7 +677,7 @@ class LinkBot(commands.Bot):
             text = text[split_at:].strip()
         return chunks
 
-    def _format_display_links(self, links: List[Link]) -> str:
+    def _format_display_links(self, links: List[LinkRef]) -> str:
         if not links:
             return "No links found."
         response = "**Links (ID | URL | Status)**\n"
@@ -444,8 +686,26 @@ class LinkBot(commands.Bot):
             response += f"- `{link.link_id}`: <{link.web_url}> — {status}\n"
         return response[:2000]  # Truncate to Discord's message limit
 
-def main():
-    db = DBClient()
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="linkbot")
+    parser.add_argument("--shard-count", type=int, default=SHARD_COUNT,
+                        help="Total number of shards across all processes")
+    parser.add_argument("--shard-ids", type=parse_shard_ids, default=SHARD_IDS,
+                        help="Shards to run in this process, e.g. 0-3 or 0,2 (requires --shard-count)")
+    args = parser.parse_args(argv)
+    if args.shard_ids and not args.shard_count:
+        parser.error("--shard-ids requires --shard-count")
+
+    setup_logging()
+    setup_tracing("linkbot", TRACING_FILE, TRACING_OTLP_ENDPOINT)
+    db = create_db_client()
+    if LEGACY_GUILD_ID:
+        adopted = db.adopt_legacy_rows(LEGACY_GUILD_ID)
+        if adopted:
+            logger.info("Assigned %d rows without a guild to guild %s", adopted, LEGACY_GUILD_ID)
+    if CANONICALIZE_STORED_URLS:
+        logger.info("Canonicalized %d stored link URLs", db.canonicalize_stored_urls())
     ai = OpenAIClient()
-    bot = LinkBot(db, ai)
-    bot.run(DISCORD_TOKEN)
+    bot = LinkBot(db, ai, run_job_workers=RUN_JOB_WORKERS, shard_count=args.shard_count, shard_ids=args.shard_ids)
+    # Keep discord.py's records in the queued handler instead of letting it install its own
+    bot.run(DISCORD_TOKEN, log_handler=None)
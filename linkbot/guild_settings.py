@@ -0,0 +1,52 @@
+# guild_settings.py
+from typing import Optional
+from linkbot.config import LINKS_CHANNEL, COMMAND_CHANNEL, PRODUCTS_CHANNEL, CONTEXT_MESSAGE_COUNT
+from linkbot.lru_cache import LRUCache
+from linkbot.models import GuildSettings
+
+class GuildSettingsService:
+    """Per-guild settings stored in GuildSettings, falling back to the process config"""
+
+    DEFAULTS = {
+        'links_channel': LINKS_CHANNEL,
+        'command_channel': COMMAND_CHANNEL,
+        'products_channel': PRODUCTS_CHANNEL,
+        'context_message_count': str(CONTEXT_MESSAGE_COUNT),
+    }
+
+    def __init__(self, db_client, cache_ttl: int = 60, cache_size: int = 1024):
+        self.db = db_client
+        # Settings can be changed from any shard process, so cached entries expire
+        self._cache = LRUCache(cache_size, ttl=cache_ttl, name='guild_settings')
+
+    def get(self, guild_id: int) -> GuildSettings:
+        """Get a guild's effective settings"""
+        settings = self._cache.get(guild_id)
+        if settings is None:
+            values = {**self.DEFAULTS, **self._load_overrides(guild_id)}
+            settings = GuildSettings(
+                links_channel=values['links_channel'],
+                command_channel=values['command_channel'],
+                products_channel=values['products_channel'],
+                context_message_count=int(values['context_message_count'])
+            )
+            self._cache.set(guild_id, settings)
+        return settings
+
+    def set(self, guild_id: int, key: str, value: Optional[str]) -> bool:
+        """Override a setting for a guild, or reset it to the default when value is None"""
+        if key not in self.DEFAULTS:
+            return False
+        if key == 'context_message_count' and value is not None and not value.isdigit():
+            return False
+        if not self.db.set_guild_setting(guild_id, key, value):
+            return False
+        self._cache.pop(guild_id)
+        return True
+
+    def _load_overrides(self, guild_id: int) -> dict:
+        return {
+            key: value
+            for key, value in self.db.get_guild_settings(guild_id).items()
+            if key in self.DEFAULTS
+        }
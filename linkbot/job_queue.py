@@ -0,0 +1,73 @@
+# job_queue.py
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from linkbot.models import Job
+from linkbot.tracing import inject_context
+
+logger = logging.getLogger(__name__)
+
+class JobQueue:
+    """Durable at-least-once work queue stored in the Jobs table.
+
+    A claimed job is leased to one worker until its visibility timeout runs
+    out. If the worker dies the lease expires and another worker claims the
+    job again, so handlers must be safe to re-run.
+    """
+
+    def __init__(self, db_client, worker_id: str, visibility_timeout: int = 300,
+                 max_attempts: int = 5, retry_base_delay: int = 10):
+        self.db = db_client
+        self.worker_id = worker_id
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+
+    def enqueue(self, job_type: str, payload: dict, dedupe_key: Optional[str] = None, delay: float = 0,
+                guild_id: int = 0) -> bool:
+        """Add a job. A job with the same dedupe_key that is still live is not added twice."""
+        # The handler continues the trace of whatever enqueued the job
+        payload = inject_context(dict(payload))
+        return self.db.enqueue_job(guild_id, job_type, json.dumps(payload), dedupe_key,
+                                   datetime.now() + timedelta(seconds=delay))
+
+    def claim(self) -> Optional[Job]:
+        """Lease the oldest due job, including running jobs whose lease expired"""
+        return self.db.claim_job(self.worker_id, datetime.now() + timedelta(seconds=self.visibility_timeout),
+                                 self.max_attempts)
+
+    def checkpoint(self, job: Job) -> bool:
+        """Persist the job's payload progress and extend its lease"""
+        return self._update_owned(job.job_id, payload=json.dumps(job.payload),
+                                  available_at=datetime.now() + timedelta(seconds=self.visibility_timeout))
+
+    def complete(self, job: Job) -> bool:
+        """Mark a job as done and release its dedupe key"""
+        return self._update_owned(job.job_id, status='done', locked_by=None, dedupe_key=None)
+
+    def retry(self, job: Job, error: str) -> bool:
+        """Put a failed job back with exponential backoff, or dead-letter it after max_attempts"""
+        if job.attempts >= self.max_attempts:
+            logger.error("Job %s (%s) moved to dead letter after %d attempts: %s", job.job_id, job.job_type, job.attempts, error)
+            return self._update_owned(job.job_id, status='dead', last_error=error, locked_by=None, dedupe_key=None)
+
+        delay = min(self.retry_base_delay * 2 ** (job.attempts - 1), 3600)
+        return self._update_owned(job.job_id, status='queued', last_error=error, locked_by=None,
+                                  available_at=datetime.now() + timedelta(seconds=delay))
+
+    def dead_letter(self, job: Job, error: str) -> bool:
+        """Give up on a job without retrying"""
+        job.attempts = self.max_attempts
+        return self.retry(job, error)
+
+    def recover(self) -> int:
+        """Requeue running jobs whose lease expired, e.g. after a crash. Returns the number recovered."""
+        return self.db.recover_jobs()
+
+    def _update_owned(self, job_id: int, **fields) -> bool:
+        """Run an update that only applies while this worker still holds the lease"""
+        updated = self.db.update_job(job_id, self.worker_id, **fields)
+        if updated == 0:
+            logger.warning("Lost lease on job %s", job_id)
+        return bool(updated)
@@ -0,0 +1,206 @@
+# job_worker.py
+import asyncio
+import logging
+import discord
+from linkbot.announcer import MAX_EMBEDS, status_embed, status_messages
+from linkbot.job_queue import JobQueue
+from linkbot.metrics import FAILURES, LINKS_INGESTED
+from linkbot.models import Job, SummaryStatus
+from linkbot.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Seconds between the last link of a status message finishing and its final render, long enough
+# for edits still waiting on rate limits in other worker processes to reach Discord first
+STATUS_SETTLE_DELAY = 30
+
+class LeaseLostError(Exception):
+    """Raised when another worker took over a job whose lease expired"""
+
+class JobWorker:
+    """Runs queued jobs in background tasks on the bot's event loop"""
+
+    def __init__(self, bot, queue: JobQueue, concurrency: int, poll_interval: float):
+        self.bot = bot
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.handlers = {
+            'ingest': self._handle_ingest,
+            'summarize': self._handle_summarize,
+            'status': self._handle_status,
+            'command': self._handle_command,
+        }
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self):
+        recovered = self.queue.recover()
+        if recovered:
+            logger.info("Recovered %d unfinished jobs", recovered)
+        for _ in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._run()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def notify(self):
+        """Wake idle workers after new jobs were enqueued"""
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            job = self.queue.claim()
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            handler = self.handlers.get(job.job_type)
+            if handler is None:
+                self.queue.dead_letter(job, f"Unknown job type: {job.job_type}")
+                continue
+
+            try:
+                with span(f"job.{job.job_type}", parent=job.payload, **{'job.id': job.job_id, 'job.attempt': job.attempts}):
+                    await handler(job)
+                self.queue.complete(job)
+            except LeaseLostError:
+                logger.warning("Abandoning %s job %s, it was claimed by another worker", job.job_type, job.job_id)
+            except Exception as e:
+                logger.exception("Error running %s job %s", job.job_type, job.job_id)
+                FAILURES.inc(stage=f"{job.job_type}_job")
+                self.queue.retry(job, str(e))
+
+    def _checkpoint(self, job: Job):
+        if not self.queue.checkpoint(job):
+            raise LeaseLostError(job.job_id)
+
+    async def _handle_ingest(self, job: Job):
+        """Save and announce the links of a shared message, then queue their summaries.
+
+        Each step records its result in the payload so a retried job resumes
+        where the previous attempt stopped instead of saving a link twice.
+        The links are announced together in status messages, one per ten links.
+        """
+        payload = job.payload
+        links = payload.setdefault('links', [])
+
+        for url in payload['urls'][len(payload.setdefault('ingested', [])):]:
+            # Store the resolved URL so a retry announces and summarizes the same one
+            url = await self.bot.url_resolver.resolve(url)
+            if all(link['url'] != url for link in links):
+                result = self.bot.db.save_link(payload['guild_id'], url, SummaryStatus.PENDING_TEXT, "other", summary_status=SummaryStatus.PENDING)
+                if result is None:
+                    raise RuntimeError(f"Failed to save link {url}")
+                LINKS_INGESTED.inc(source='message')
+                links.append({
+                    'url': url,
+                    'link_id': result.link_id,
+                    'previous_link_id': result.previous_link_id,
+                    'duplicate': not result.is_new
+                })
+            payload['ingested'].append(url)
+            self._checkpoint(job)
+
+        message_ids = payload.setdefault('message_ids', [])
+        for message in status_messages(links, payload['author_mention'])[len(message_ids):]:
+            announcement = await self.bot.announcer.send(payload['channel_id'], **message)
+            message_ids.append(announcement.id)
+            self._checkpoint(job)
+
+        # One summarize job per link, keyed like the summary sweep's so no link is queued twice
+        for position, link in enumerate(links):
+            first = position - position % MAX_EMBEDS
+            self.queue.enqueue('summarize', {
+                'guild_id': payload['guild_id'],
+                'link_id': link['link_id'],
+                'previous_link_id': link['previous_link_id'],
+                'url': link['url'],
+                'channel_id': payload['channel_id'],
+                'message_id': message_ids[position // MAX_EMBEDS],
+                'message_links': links[first:first + MAX_EMBEDS],
+                'products_channel_id': payload.get('products_channel_id')
+            }, dedupe_key=f"summarize:{link['link_id']}", guild_id=payload['guild_id'])
+        self.notify()
+
+    async def _handle_summarize(self, job: Job):
+        """Scrape and summarize a saved link, then update the status message announcing it"""
+        payload = job.payload
+        url = payload['url']
+
+        if 'summary_status' not in payload:
+            # A re-share of an already summarized page reuses the summary of its previous version
+            previous = None
+            if payload.get('previous_link_id'):
+                previous = next(iter(self.bot.db.get_links_by_ids(payload['guild_id'], [payload['previous_link_id']])), None)
+            if previous and previous.summary_status == SummaryStatus.DONE:
+                summary, category = previous.summary, previous.category
+            else:
+                content = await self.bot.scraper.get_web_content(url)
+                summary, category = await self.bot.ai.generate_summary(content) if content else (SummaryStatus.NO_SUMMARY, "other")
+            status = SummaryStatus.FAILED if summary == SummaryStatus.NO_SUMMARY else SummaryStatus.DONE
+            self.bot.db.update_link_summary(payload['link_id'], summary, category, status)
+            payload.update(category=category, summary_status=status)
+            self._checkpoint(job)
+
+            if status != SummaryStatus.DONE:
+                FAILURES.inc(stage='summary')
+
+        # Links re-enqueued by the summary backfill sweep have no status message
+        if payload.get('message_id'):
+            try:
+                await self._edit_status_message(payload)
+            except discord.HTTPException as e:
+                logger.warning("Error editing announcement: %s", e)
+            # Edits from other worker processes can reach Discord out of order, so once every
+            # link is finished one more render shows the final state after they settled
+            if all(link.get('summary_status') in (SummaryStatus.DONE, SummaryStatus.FAILED)
+                   for link in self._stored_links(payload['guild_id'], payload['message_links'])):
+                self.queue.enqueue('status', {
+                    'guild_id': payload['guild_id'],
+                    'channel_id': payload['channel_id'],
+                    'message_id': payload['message_id'],
+                    'message_links': payload['message_links']
+                }, dedupe_key=f"status:{payload['message_id']}", delay=STATUS_SETTLE_DELAY, guild_id=payload['guild_id'])
+
+        # If it is a product or service send in products channel
+        if payload.get('products_channel_id') and payload['category'] == "product/service":
+            await self.bot.announcer.send(payload['products_channel_id'], content=f"New product saved <{url}>")
+
+    async def _handle_status(self, job: Job):
+        """Render a status message from the stored summaries of its links"""
+        try:
+            await self._edit_status_message(job.payload)
+        except discord.NotFound:
+            # Removed with a ❌ reaction
+            pass
+
+    async def _edit_status_message(self, payload: dict):
+        """Edit a status message, rendered from the stored summaries when the edit is sent"""
+        def render() -> dict:
+            return {'embeds': [status_embed(link) for link in self._stored_links(payload['guild_id'], payload['message_links'])]}
+        await self.bot.announcer.edit(payload['channel_id'], payload['message_id'], render=render)
+
+    def _stored_links(self, guild_id: int, links: list[dict]) -> list[dict]:
+        """Links of a status message with their stored summaries"""
+        saved = {link.link_id: link for link in self.bot.db.get_links_by_ids(guild_id, [link['link_id'] for link in links])}
+        merged = []
+        for link in links:
+            stored = saved.get(link['link_id'])
+            if stored:
+                link = {**link, 'summary': stored.summary, 'category': stored.category, 'summary_status': stored.summary_status}
+            merged.append(link)
+        return merged
+
+    async def _handle_command(self, job: Job):
+        """Answer a free-form request enqueued by a gateway-only bot process"""
+        payload = job.payload
+        channel = self.bot.get_partial_messageable(payload['channel_id'])
+        await self.bot.answer_query(payload['guild_id'], channel, payload['content'], payload['author'])
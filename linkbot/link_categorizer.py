@@ -30,7 +30,6 @@ class LinkCategorizer:
             return "No links found in database"
 
         output = "**Categorized Links**\n\n"
-        print(links_by_category)
         for category, links in links_by_category.items():
             if category and links:
                 output += f"**{category.upper()}** ({len(links)} links):\n"
@@ -0,0 +1,59 @@
+# link_pages.py
+import discord
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+Cursor = Tuple[datetime, int]
+
+class LinkPageView(discord.ui.View):
+    """Previous/next buttons for a keyset-paginated link listing.
+
+    `fetch_page(after)` renders the page that follows the cursor `after`
+    (None for the first page) and returns the message content together
+    with the cursor of the next page, or None on the last page.
+    """
+
+    def __init__(self, fetch_page: Callable[[Optional[Cursor]], Tuple[str, Optional[Cursor]]],
+                 author_id: int, next_cursor: Optional[Cursor], timeout: float = 300):
+        super().__init__(timeout=timeout)
+        self.fetch_page = fetch_page
+        self.author_id = author_id
+        self.message: Optional[discord.Message] = None
+        # Cursors used to open each visited page, the last one is the current page
+        self._cursors: list[Optional[Cursor]] = [None]
+        self._next_cursor = next_cursor
+        self._update_buttons()
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Only the person who ran the command can change pages.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self._cursors.pop()
+        await self._show(interaction, self._cursors[-1])
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self._cursors.append(self._next_cursor)
+        await self._show(interaction, self._next_cursor)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+    async def _show(self, interaction: discord.Interaction, after: Optional[Cursor]):
+        content, self._next_cursor = self.fetch_page(after)
+        self._update_buttons()
+        await interaction.response.edit_message(content=content, view=self)
+
+    def _update_buttons(self):
+        self.previous_page.disabled = len(self._cursors) <= 1
+        self.next_page.disabled = self._next_cursor is None
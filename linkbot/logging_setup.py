@@ -0,0 +1,68 @@
+# logging_setup.py
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+from typing import Any, Optional
+from linkbot.config import LOG_LEVEL, LOG_FORMAT, LOG_DEBUG_CONTEXT, LOG_PAYLOAD_MAX_CHARS, LOG_PAYLOAD_SAMPLE_RATE
+
+# Attributes every LogRecord has, anything else was passed through `extra=`
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with `extra=` fields as top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_FIELDS)
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def setup_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, debug_context: bool = LOG_DEBUG_CONTEXT):
+    """Route all logging through a queue so the event loop never blocks on writing to stderr.
+
+    Records are put on the queue by the logging call and written by a
+    listener thread. Safe to call more than once, later calls are ignored.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    handler = logging.StreamHandler()
+    if fmt == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)-8s %(name)s: %(message)s'))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level.upper())
+    # AI context packages are large, they are only logged when asked for
+    logging.getLogger('linkbot.context').setLevel(logging.DEBUG if debug_context else logging.WARNING)
+
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+def truncate(value: Any, limit: int = LOG_PAYLOAD_MAX_CHARS) -> str:
+    """String form of a payload cut to `limit` characters for logging"""
+    text = str(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... ({len(text)} chars)"
+
+def log_payload(logger: logging.Logger, message: str, payload: Any):
+    """Log a large payload at debug level, truncated and only for a sample of calls"""
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < LOG_PAYLOAD_SAMPLE_RATE:
+        logger.debug("%s: %s", message, truncate(payload))
@@ -0,0 +1,51 @@
+# lru_cache.py
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from linkbot.metrics import CACHE_REQUESTS
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry, with optional expiry.
+
+    Lookups of a named cache are counted as hits and misses in the metrics.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and time.monotonic() >= entry[1]:
+            del self._data[key]
+            entry = None
+        if self.name:
+            CACHE_REQUESTS.inc(cache=self.name, result='miss' if entry is None else 'hit')
+        if entry is None:
+            return default
+        self._data.move_to_end(key)
+        return entry[0]
+
+    def set(self, key: Hashable, value: Any):
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return entry[0] if entry is not None else default
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+_MISSING = object()
@@ -0,0 +1,136 @@
+# metrics.py
+import asyncio
+import functools
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Optional
+from aiohttp import web
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+REGISTRY: list = []
+
+class Metric(ABC):
+    """A named metric with labelled series, exposed in the Prometheus text format"""
+
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._series: dict[tuple, object] = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, key: tuple, extra: Optional[dict] = None) -> str:
+        pairs = list(zip(self.labelnames, key)) + list((extra or {}).items())
+        if not pairs:
+            return ''
+        escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+        return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for key, series in sorted(self._series.items()):
+            lines.extend(self._render_series(key, series))
+        return lines
+
+    @abstractmethod
+    def _render_series(self, key: tuple, series) -> list[str]:
+        """Exposition lines of one labelled series"""
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self._series[key] = self._series.get(key, 0) + amount
+
+    def _render_series(self, key: tuple, value) -> list[str]:
+        return [f"{self.name}{self._format_labels(key)} {value}"]
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            # Per-bucket counts, made cumulative when rendered, followed by sum and count
+            series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        series[-2] += value
+        series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def timed(self, label: str):
+        """Decorator observing the duration of each call, labelled with the function's name"""
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.time(**{label: func.__name__}):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(**{label: func.__name__}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _render_series(self, key: tuple, series) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, series):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': repr(float(bound))})} {cumulative}")
+        lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': '+Inf'})} {series[-1]}")
+        lines.append(f"{self.name}_sum{self._format_labels(key)} {series[-2]}")
+        lines.append(f"{self.name}_count{self._format_labels(key)} {series[-1]}")
+        return lines
+
+SCRAPE_SECONDS = Histogram('linkbot_scrape_duration_seconds', "Time to fetch and extract a page", ('content',))
+LLM_SECONDS = Histogram('linkbot_llm_duration_seconds', "Chat completion latency", ('call',))
+LLM_TOKENS = Histogram('linkbot_llm_tokens', "Tokens used per chat completion", ('call', 'kind'), buckets=TOKEN_BUCKETS)
+DB_QUERY_SECONDS = Histogram('linkbot_db_query_duration_seconds', "Storage backend method latency, including retries", ('method',))
+DB_POOL_WAIT_SECONDS = Histogram('linkbot_db_pool_wait_seconds', "Time to get a connection from the pool")
+LINKS_INGESTED = Counter('linkbot_links_ingested_total', "Links saved", ('source',))
+CACHE_REQUESTS = Counter('linkbot_cache_requests_total', "Cache lookups", ('cache', 'result'))
+FAILURES = Counter('linkbot_failures_total', "Failed operations", ('stage',))
+
+def render() -> str:
+    return '\n'.join(line for metric in REGISTRY for line in metric.render()) + '\n'
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Serve /metrics on the running event loop, returns the runner to clean up on shutdown"""
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(body=render().encode('utf-8'),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -1,12 +1,71 @@
 # models.py
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Any, NamedTuple, Optional
 
-@dataclass
-class Link:
+class Link(NamedTuple):
+    """A stored link.
+
+    A NamedTuple keeps rows immutable and free of a per-instance __dict__,
+    and Link._make(row) maps a tuple cursor row without an intermediate dict.
+    """
     link_id: int
     web_url: str
     summary: str
     category: str
     creation_date: datetime
-    deleted: bool = False
\ No newline at end of file
+    deleted: bool = False
+    summary_status: str = 'done'
+    summary_attempts: int = 0
+    guild_id: int = 0
+
+class LinkRef(NamedTuple):
+    """Lightweight projection of a link for listings and lookups that don't need the summary"""
+    link_id: int
+    web_url: str
+    deleted: bool
+    creation_date: datetime
+
+class SaveResult(NamedTuple):
+    """Outcome of DBClient.save_link"""
+    link_id: int
+    previous_link_id: Optional[int] = None  # Active version that was superseded, if any
+
+    @property
+    def is_new(self) -> bool:
+        return self.previous_link_id is None
+
+class SummaryStatus:
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    PENDING_TEXT = "Summary pending"
+    NO_SUMMARY = "No summary available"
+
+@dataclass
+class Job:
+    job_id: int
+    job_type: str
+    payload: dict[str, Any]
+    attempts: int
+
+@dataclass
+class GuildSettings:
+    links_channel: Optional[str]
+    command_channel: Optional[str]
+    products_channel: Optional[str]
+    context_message_count: int
+
+@dataclass
+class BackfillProgress:
+    messages_scanned: int = 0
+    links_found: int = 0
+    links_saved: int = 0
+    queued: int = 0
+    done: bool = False
+
+    def __str__(self) -> str:
+        state = "Done" if self.done else "Running"
+        return (f"{state}: {self.messages_scanned} messages scanned, {self.links_found} links found, "
+                f"{self.links_saved} new, {self.queued} queued for summaries")
\ No newline at end of file
@@ -1,18 +1,42 @@
 # openai_client.py (updated with error handling)
 from openai import AsyncOpenAI
 import json
+import logging
 from typing import Dict, Any
-from linkbot.config import OPENROUTER_API_KEY, DEEPSEEK_MODEL
+from linkbot.config import OPENROUTER_API_KEY, OPENROUTER_BASE_URL, DEEPSEEK_MODEL
 from linkbot.backtick_scrubber import BacktickScrubber
 from linkbot.link_categorizer import LinkCategorizer
+from linkbot.logging_setup import log_payload
+from linkbot.metrics import FAILURES, LLM_SECONDS, LLM_TOKENS
+from linkbot.tracing import set_attributes, span
+from linkbot.models import SummaryStatus
+
+logger = logging.getLogger(__name__)
+context_logger = logging.getLogger('linkbot.context')
 
 class OpenAIClient:
-    def __init__(self):
+    def __init__(self, base_url: str = OPENROUTER_BASE_URL, api_key: str = OPENROUTER_API_KEY):
         self.client = AsyncOpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=OPENROUTER_API_KEY,
+            base_url=base_url,
+            api_key=api_key,
         )
 
+    async def _create(self, call: str, **kwargs):
+        """Run a chat completion, recording its latency and token usage per call type"""
+        with span(f"llm.{call}", **{'llm.model': kwargs.get('model')}):
+            try:
+                with LLM_SECONDS.time(call=call):
+                    response = await self.client.chat.completions.create(**kwargs)
+            except Exception:
+                FAILURES.inc(stage='llm')
+                raise
+            usage = getattr(response, 'usage', None)
+            if usage:
+                LLM_TOKENS.observe(usage.prompt_tokens or 0, call=call, kind='prompt')
+                LLM_TOKENS.observe(usage.completion_tokens or 0, call=call, kind='completion')
+                set_attributes(**{'llm.prompt_tokens': usage.prompt_tokens, 'llm.completion_tokens': usage.completion_tokens})
+            return response
+
     async def classify_command(self, query: str) -> Dict[str, Any]:
         """Classify user command with robust error handling"""
         default_response = {"command_type": "NONE"}
@@ -71,7 +95,8 @@ max_results is the maximum number of results to return if needed null to only li
         """
 
         try:
-            response = await self.client.chat.completions.create(
+            response = await self._create(
+                'classify_command',
                 model=DEEPSEEK_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -84,7 +109,7 @@ max_results is the maximum number of results to return if needed null to only li
                 # tool_choice=[{"name": "classify_user_intent"}]
             )
         except Exception as e:
-            print(f"API request failed: {str(e)}")
+            logger.error("API request failed: %s", e)
             return default_response
 
         try:
@@ -102,10 +127,10 @@ max_results is the maximum number of results to return if needed null to only li
                 "max_results": args.get("max_results")
             }
         except json.JSONDecodeError:
-            print("Failed to parse function arguments")
+            logger.warning("Failed to parse function arguments")
             return default_response
         except (KeyError, IndexError, AttributeError) as e:
-            print(f"Invalid response structure: {str(e)}")
+            logger.warning("Invalid response structure: %s", e)
             return default_response
 
     async def generate_summary(self, content: str) -> tuple[str, str]:
@@ -117,7 +142,8 @@ max_results is the maximum number of results to return if needed null to only li
 Respond ONLY with JSON format: {{"summary": "...", "category": "..."}}"""
 
         try:
-            response = await self.client.chat.completions.create(
+            response = await self._create(
+                'generate_summary',
                 model=DEEPSEEK_MODEL,
                 messages=[
                     {"role": "system", "content": system_msg},
@@ -128,12 +154,12 @@ Respond ONLY with JSON format: {{"summary": "...", "category": "..."}}"""
             )
             result = json.loads(response.choices[0].message.content)
             return (
-                result.get("summary", "No summary available"),
+                result.get("summary", SummaryStatus.NO_SUMMARY),
                 result.get("category", "other").lower()
             )
         except Exception as e:
-            print(f"Summary generation error: {str(e)}")
-            return ("No summary available", "other")
+            logger.error("Summary generation error: %s", e)
+            return (SummaryStatus.NO_SUMMARY, "other")
 
     async def filter_relevant_links(self, query: str, links: list[str]) -> list[int]:
         # tools = [{
@@ -167,7 +193,8 @@ REQUIRED: link_ids
 link_ids are the relevant link IDs.
         """
 
-        response = await self.client.chat.completions.create(
+        response = await self._create(
+            'filter_relevant_links',
             model=DEEPSEEK_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -175,11 +202,11 @@ link_ids are the relevant link IDs.
             ]
         )
 
-        print("Response\n", response)
-        
+        log_payload(logger, "filter_relevant_links response", response)
+
         message = BacktickScrubber.scrub_json_backticks(response.choices[0].message.content)
 
-        print("Message:\n", message)
+        log_payload(logger, "filter_relevant_links message", message)
         if message:
             args = json.loads(message)
             return args.get("link_ids", [])
@@ -187,7 +214,7 @@ link_ids are the relevant link IDs.
         
 
     async def generate_response(self, query: str, context: list[str]) -> str:
-        print(context)
+        log_payload(context_logger, "generate_response context", context)
 
         messages = [{
             "role": "system",
@@ -202,7 +229,8 @@ link_ids are the relevant link IDs.
             
         messages.append({"role": "user", "content": query})
         
-        response = await self.client.chat.completions.create(
+        response = await self._create(
+            'generate_response',
             model=DEEPSEEK_MODEL,
             messages=messages,
             temperature=0.6,
@@ -0,0 +1,673 @@
+# sqlite_database.py
+import json
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from linkbot.models import Job, Link, LinkRef, SaveResult, SummaryStatus
+from linkbot.storage import StorageBackend, instrumented, search_terms
+from linkbot.url_canonicalizer import canonicalize_url
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+logger = logging.getLogger(__name__)
+
+# Columns declared DATETIME and BOOLEAN come back as datetime and bool, like from MySQL.
+# A fixed-width format keeps text comparisons of stored datetimes in time order.
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" ", timespec="microseconds"))
+sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter("BOOLEAN", lambda value: bool(int(value)))
+
+# Only a busy database is worth retrying, it stays locked past busy_timeout under heavy write load
+retry_when_busy = retry(
+    retry=retry_if_exception_type(sqlite3.OperationalError),
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=1, max=10),
+    reraise=True
+)
+
+class SQLiteDBClient(StorageBackend):
+    """SQLite storage backend for single-host deployments.
+
+    The database runs in WAL mode, so readers never block the writer. Each
+    thread gets its own connection, writes run in BEGIN IMMEDIATE
+    transactions that take the write lock up front, which also serializes
+    job claims the way SKIP LOCKED does on MySQL. Link URLs and summaries
+    are indexed in an FTS5 table kept in sync by triggers.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 5.0):
+        super().__init__()
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._create_tables()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode, transactions are opened explicitly by _transaction
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None,
+                               detect_types=sqlite3.PARSE_DECLTYPES)
+        conn.execute("PRAGMA journal_mode = WAL")
+        # In WAL mode NORMAL only risks the last transactions on power loss, never corruption
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    @contextmanager
+    def _get_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        yield conn
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in a write transaction, rolled back if one of them fails"""
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn.cursor()
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        """Close the calling thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _create_tables(self):
+        """Create required tables on startup"""
+        try:
+            with self._transaction() as cursor:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS Links (
+                        link_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        guild_id INTEGER NOT NULL DEFAULT 0,
+                        web_url TEXT NOT NULL,
+                        url_hash BLOB NOT NULL,
+                        summary TEXT NOT NULL,
+                        category TEXT NOT NULL,
+                        creation_date DATETIME NOT NULL,
+                        deleted BOOLEAN NOT NULL DEFAULT 1,
+                        summary_status TEXT NOT NULL DEFAULT 'done',
+                        summary_attempts INTEGER NOT NULL DEFAULT 0
+                    )
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_links_guild_created ON Links (guild_id, deleted, creation_date, link_id)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_links_guild_page ON Links (guild_id, creation_date, link_id)")
+                # At most one active version per URL
+                cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_links_active_url ON Links (guild_id, url_hash) WHERE deleted = 0")
+
+                # Full-text index over Links for !search, the triggers keep it in sync
+                cursor.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS LinksFts USING fts5(
+                        web_url, summary, content='Links', content_rowid='link_id'
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS links_fts_insert AFTER INSERT ON Links BEGIN
+                        INSERT INTO LinksFts (rowid, web_url, summary) VALUES (new.link_id, new.web_url, new.summary);
+                    END
+                """)
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS links_fts_delete AFTER DELETE ON Links BEGIN
+                        INSERT INTO LinksFts (LinksFts, rowid, web_url, summary) VALUES ('delete', old.link_id, old.web_url, old.summary);
+                    END
+                """)
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS links_fts_update AFTER UPDATE OF web_url, summary ON Links BEGIN
+                        INSERT INTO LinksFts (LinksFts, rowid, web_url, summary) VALUES ('delete', old.link_id, old.web_url, old.summary);
+                        INSERT INTO LinksFts (rowid, web_url, summary) VALUES (new.link_id, new.web_url, new.summary);
+                    END
+                """)
+
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS ExcludedChannels (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        guild_id INTEGER NOT NULL DEFAULT 0,
+                        channel_id TEXT NOT NULL,
+                        created_at DATETIME NOT NULL,
+                        UNIQUE (guild_id, channel_id)
+                    )
+                """)
+
+                # available_at doubles as the lease expiry of running jobs
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS Jobs (
+                        job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        guild_id INTEGER NOT NULL DEFAULT 0,
+                        job_type TEXT NOT NULL,
+                        payload TEXT NOT NULL,
+                        status TEXT NOT NULL DEFAULT 'queued',
+                        dedupe_key TEXT NULL UNIQUE,
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        locked_by TEXT NULL,
+                        last_error TEXT NULL,
+                        available_at DATETIME NOT NULL,
+                        created_at DATETIME NOT NULL,
+                        updated_at DATETIME NOT NULL
+                    )
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON Jobs (status, available_at)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_guild ON Jobs (guild_id, status)")
+
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS GuildSettings (
+                        guild_id INTEGER NOT NULL,
+                        setting_key TEXT NOT NULL,
+                        setting_value TEXT NOT NULL,
+                        updated_at DATETIME NOT NULL,
+                        PRIMARY KEY (guild_id, setting_key)
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS BackfillCheckpoints (
+                        guild_id INTEGER NOT NULL,
+                        channel_id INTEGER NOT NULL,
+                        last_message_id INTEGER NOT NULL,
+                        updated_at DATETIME NOT NULL,
+                        PRIMARY KEY (guild_id, channel_id)
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS ResolvedUrls (
+                        url_hash BLOB PRIMARY KEY,
+                        resolved_url TEXT NOT NULL,
+                        resolved_at DATETIME NOT NULL
+                    )
+                """)
+        except sqlite3.Error as e:
+            logger.error("Error creating tables: %s", e)
+
+    ### Links
+
+    def adopt_legacy_rows(self, guild_id: int) -> int:
+        """Assign rows saved before guild partitioning (guild_id 0) to a guild"""
+        try:
+            with self._transaction() as cursor:
+                adopted = 0
+                for table in ('Links', 'ExcludedChannels'):
+                    cursor.execute(f"UPDATE {table} SET guild_id = ? WHERE guild_id = 0", (guild_id,))
+                    adopted += cursor.rowcount
+                return adopted
+        except sqlite3.Error as e:
+            logger.error("Error adopting legacy rows: %s", e)
+            return 0
+
+    def canonicalize_stored_urls(self, batch_size: int = 500) -> int:
+        # SQLite databases postdate URL canonicalization, every stored URL is already canonical
+        return 0
+
+    @instrumented
+    @retry_when_busy
+    def save_link(self, guild_id: int, web_url: str, summary: str, category: str,
+                  summary_status: str = SummaryStatus.DONE) -> Optional[SaveResult]:
+        """Save a link as the active version of its URL, superseding the previous active version"""
+        web_url = canonicalize_url(web_url)
+        url_hash = self._url_hash(web_url)
+        try:
+            with self._transaction() as cursor:
+                # The write lock is held from BEGIN IMMEDIATE, so no other share can slip in between
+                cursor.execute("""
+                    UPDATE Links SET deleted = 1
+                    WHERE guild_id = ? AND url_hash = ? AND deleted = 0
+                    RETURNING link_id
+                """, (guild_id, url_hash))
+                previous = cursor.fetchone()
+
+                creation_date = datetime.now()
+                cursor.execute("""
+                    INSERT INTO Links (guild_id, web_url, url_hash, summary, category, creation_date, deleted, summary_status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (guild_id, web_url, url_hash, summary, category, creation_date, False, summary_status))
+                result = SaveResult(cursor.lastrowid, previous[0] if previous else None)
+        except sqlite3.OperationalError:
+            raise
+        except sqlite3.Error as e:
+            logger.error("Error saving link: %s", e)
+            return None
+        # Replaces the cached previous version of the URL
+        self._cache_link(guild_id, LinkRef(result.link_id, web_url, False, creation_date))
+        return result
+
+    @instrumented
+    @retry_when_busy
+    def save_links_bulk(self, guild_id: int, links: list[Tuple[str, datetime]]) -> int:
+        """Insert (web_url, creation_date) pairs with pending summaries in one transaction.
+
+        URLs that already have an active version are skipped rather than superseded.
+        Returns the number of links inserted.
+        """
+        if not links:
+            return 0
+        rows = [
+            (guild_id, canonicalize_url(web_url), self._url_hash(web_url), SummaryStatus.PENDING_TEXT, "other",
+             creation_date, False, SummaryStatus.PENDING)
+            for web_url, creation_date in links
+        ]
+        try:
+            with self._transaction() as cursor:
+                cursor.executemany("""
+                    INSERT OR IGNORE INTO Links (guild_id, web_url, url_hash, summary, category, creation_date, deleted, summary_status)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                return cursor.rowcount
+        except sqlite3.OperationalError:
+            raise
+        except sqlite3.Error as e:
+            logger.error("Error bulk saving links: %s", e)
+            return 0
+
+    @instrumented
+    @retry_when_busy
+    def get_pending_link_refs(self, guild_id: int, urls: list[str]) -> list[LinkRef]:
+        """Active links among `urls` that still wait for a summary"""
+        if not urls:
+            return []
+        hashes = [self._url_hash(url) for url in urls]
+        with self._get_connection() as conn:
+            cursor = conn.execute(f"""
+                SELECT {self.LINK_REF_COLUMNS} FROM Links
+                WHERE guild_id = ? AND deleted = 0 AND summary_status = ?
+                AND url_hash IN ({','.join('?' * len(hashes))})
+            """, (guild_id, SummaryStatus.PENDING, *hashes))
+            return [LinkRef._make(row) for row in cursor.fetchall()]
+
+    @instrumented
+    @retry_when_busy
+    def update_link_summary(self, link_id: int, summary: str, category: str, summary_status: str) -> bool:
+        """Fill in the summary of a link saved with a pending summary"""
+        try:
+            with self._transaction() as cursor:
+                cursor.execute("""
+                    UPDATE Links
+                    SET summary = ?, category = ?, summary_status = ?,
+                        summary_attempts = summary_attempts + 1
+                    WHERE link_id = ?
+                """, (summary, category, summary_status, link_id))
+                return cursor.rowcount > 0
+        except sqlite3.OperationalError:
+            raise
+        except sqlite3.Error as e:
+            logger.error("Error updating link summary: %s", e)
+            return False
+
+    @instrumented
+    @retry_when_busy
+    def get_links_needing_summary(self, max_attempts: int, limit: int = 100) -> list[Link]:
+        """Active links whose summary is still pending or failed and may be retried"""
+        with self._get_connection() as conn:
+            cursor = conn.execute(f"""
+                SELECT {self.LINK_COLUMNS} FROM Links
+                WHERE deleted = 0
+                AND summary_status IN (?, ?)
+                AND summary_attempts < ?
+                ORDER BY creation_date DESC
+                LIMIT ?
+            """, (SummaryStatus.PENDING, SummaryStatus.FAILED, max_attempts, limit))
+            return [Link._make(row) for row in cursor.fetchall()]
+
+    @instrumented
+    @retry_when_busy
+    def get_links_by_category(self, guild_id: int, after: Optional[Tuple[datetime, int]] = None,
+                              limit: Optional[int] = None) -> dict:
+        """Get links grouped by category, optionally one keyset page older than `after` (creation_date, link_id)"""
+        query = """
+            SELECT category, web_url, summary, link_id, creation_date
+            FROM Links
+            WHERE guild_id = ? AND deleted = 0"""
+        params = [guild_id]
+        query, params = self._add_keyset_page(query, params, after, limit)
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(query, params)
+            categorized = {}
+            for row in cursor.fetchall():
+                categorized.setdefault(row['category'], []).append(dict(row))
+            return categorized
+
+    @instrumented
+    def get_links_by_ids(self, guild_id: int, link_ids: list[int]) -> list[Link]:
+        with self._get_connection() as conn:
+            cursor = conn.execute(f"""
+                SELECT {self.LINK_COLUMNS} FROM Links
+                WHERE guild_id = ? AND link_id IN ({','.join('?' * len(link_ids))})
+            """, (guild_id, *link_ids))
+            return [Link._make(row) for row in cursor.fetchall()]
+
+    @instrumented
+    @retry_when_busy
+    def get_link_by_url(self, guild_id: int, url: str) -> Optional[Link]:
+        """Find an active link by its URL"""
+        with self._get_connection() as conn:
+            result = conn.execute(f"""
+                SELECT {self.LINK_COLUMNS} FROM Links
+                WHERE guild_id = ? AND url_hash = ? AND deleted = 0
+            """, (guild_id, self._url_hash(url))).fetchone()
+            return Link._make(result) if result else None
+
+    @instrumented
+    @retry_when_busy
+    def _select_link_ref_by_url(self, guild_id: int, url: str) -> Optional[LinkRef]:
+        with self._get_connection() as conn:
+            result = conn.execute(f"""
+                SELECT {self.LINK_REF_COLUMNS} FROM Links
+                WHERE guild_id = ? AND url_hash = ? AND deleted = 0
+            """, (guild_id, self._url_hash(url))).fetchone()
+            return LinkRef._make(result) if result else None
+
+    @instrumented
+    @retry_when_busy
+    def get_all_links(self, guild_id: int, include_deleted: bool = False) -> list[Link]:
+        """Retrieve all links, optionally including deleted ones."""
+        query = f"SELECT {self.LINK_COLUMNS} FROM Links WHERE guild_id = ?"
+        if not include_deleted:
+            query += " AND deleted = 0"
+        query += " ORDER BY creation_date DESC"
+
+        with self._get_connection() as conn:
+            return [Link._make(row) for row in conn.execute(query, (guild_id,)).fetchall()]
+
+    @instrumented
+    @retry_when_busy
+    def get_link_refs_page(self, guild_id: int, include_deleted: bool = False,
+                           after: Optional[Tuple[datetime, int]] = None, limit: int = 15) -> list[LinkRef]:
+        """Get one keyset page of link refs, newest first, older than `after` (creation_date, link_id)"""
+        query = f"SELECT {self.LINK_REF_COLUMNS} FROM Links WHERE guild_id = ?"
+        params = [guild_id]
+        if not include_deleted:
+            query += " AND deleted = 0"
+        query, params = self._add_keyset_page(query, params, after, limit)
+
+        with self._get_connection() as conn:
+            return [LinkRef._make(row) for row in conn.execute(query, params).fetchall()]
+
+    def _add_keyset_page(self, query: str, params: list, after: Optional[Tuple[datetime, int]],
+                         limit: Optional[int]) -> Tuple[str, list]:
+        """Continue a query after the (creation_date, link_id) cursor, newest first"""
+        if after is not None:
+            query += " AND (creation_date < ? OR (creation_date = ? AND link_id < ?))"
+            params += [after[0], after[0], after[1]]
+        query += " ORDER BY creation_date DESC, link_id DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return query, params
+
+    @instrumented
+    def delete_link(self, guild_id: int, link_id: int) -> bool:
+        """Soft delete a link by marking deleted as True."""
+        try:
+            with self._transaction() as cursor:
+                cursor.execute("SELECT web_url FROM Links WHERE guild_id = ? AND link_id = ?", (guild_id, link_id))
+                row = cursor.fetchone()
+                cursor.execute("UPDATE Links SET deleted = 1 WHERE guild_id = ? AND link_id = ?", (guild_id, link_id))
+                deleted = cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error("Error deleting link: %s", e)
+            return False
+        if row is not None:
+            self._uncache_link(guild_id, row[0], link_id)
+        return deleted
+
+    @instrumented
+    def restore_link(self, guild_id: int, link_id: int) -> bool:
+        """Restore a soft-deleted link by marking deleted as False."""
+        try:
+            with self._transaction() as cursor:
+                cursor.execute("UPDATE Links SET deleted = 0 WHERE guild_id = ? AND link_id = ?", (guild_id, link_id))
+                restored = cursor.rowcount > 0
+        except sqlite3.IntegrityError:
+            logger.warning("Cannot restore link %s, another version of its URL is active", link_id)
+            return False
+        except sqlite3.Error as e:
+            logger.error("Error restoring link: %s", e)
+            return False
+        if restored:
+            self._cache_restored_link(guild_id, link_id)
+        return restored
+
+    @instrumented
+    @retry_when_busy
+    def get_recent_links(self, guild_id: int, days_ago: int = None, limit: int = None) -> list[Link]:
+        query = f"SELECT {self.LINK_COLUMNS} FROM Links WHERE guild_id = ? AND deleted = 0"
+        params = [guild_id]
+
+        if days_ago is not None:
+            query += " AND creation_date >= ?"
+            params.append(datetime.now() - timedelta(days=days_ago))
+
+        query += " ORDER BY creation_date DESC"
+
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._get_connection() as conn:
+            return [Link._make(row) for row in conn.execute(query, params).fetchall()]
+
+    @instrumented
+    @retry_when_busy
+    def search_links(self, guild_id: int, query: str, limit: int = 15) -> list[LinkRef]:
+        terms = search_terms(query)
+        if not terms:
+            return []
+        # Quoted terms are matched literally, any of them matches and bm25 ranks links with more of them first
+        match = " OR ".join(f'"{term}"' for term in terms)
+        with self._get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT Links.link_id, Links.web_url, Links.deleted, Links.creation_date
+                FROM LinksFts JOIN Links ON Links.link_id = LinksFts.rowid
+                WHERE LinksFts MATCH ? AND Links.guild_id = ? AND Links.deleted = 0
+                ORDER BY bm25(LinksFts), Links.creation_date DESC
+                LIMIT ?
+            """, (match, guild_id, limit))
+            return [LinkRef._make(row) for row in cursor.fetchall()]
+
+    ### Guild settings and channel exclusions
+
+    @instrumented
+    def get_guild_settings(self, guild_id: int) -> dict[str, str]:
+        try:
+            with self._get_connection() as conn:
+                return dict(conn.execute("""
+                    SELECT setting_key, setting_value FROM GuildSettings
+                    WHERE guild_id = ?
+                """, (guild_id,)).fetchall())
+        except sqlite3.Error as e:
+            logger.error("Error fetching guild settings: %s", e)
+            return {}
+
+    @instrumented
+    def set_guild_setting(self, guild_id: int, key: str, value: Optional[str]) -> bool:
+        try:
+            with self._transaction() as cursor:
+                if value is None:
+                    cursor.execute("DELETE FROM GuildSettings WHERE guild_id = ? AND setting_key = ?", (guild_id, key))
+                else:
+                    cursor.execute("""
+                        INSERT INTO GuildSettings (guild_id, setting_key, setting_value, updated_at)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT (guild_id, setting_key)
+                        DO UPDATE SET setting_value = excluded.setting_value, updated_at = excluded.updated_at
+                    """, (guild_id, key, value, datetime.now()))
+                return True
+        except sqlite3.Error as e:
+            logger.error("Error saving guild setting: %s", e)
+            return False
+
+    @instrumented
+    def add_excluded_channel(self, guild_id: int, channel_id: str) -> bool:
+        try:
+            with self._transaction() as cursor:
+                cursor.execute("""
+                    INSERT OR IGNORE INTO ExcludedChannels (guild_id, channel_id, created_at)
+                    VALUES (?, ?, ?)
+                """, (guild_id, channel_id, datetime.now()))
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error("Error excluding channel: %s", e)
+            return False
+
+    @instrumented
+    def remove_excluded_channel(self, guild_id: int, channel_id: str) -> bool:
+        try:
+            with self._transaction() as cursor:
+                cursor.execute("DELETE FROM ExcludedChannels WHERE guild_id = ? AND channel_id = ?", (guild_id, channel_id))
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error("Error unexcluding channel: %s", e)
+            return False
+
+    @instrumented
+    def get_excluded_channels(self, guild_id: int) -> list[str]:
+        try:
+            with self._get_connection() as conn:
+                rows = conn.execute("SELECT channel_id FROM ExcludedChannels WHERE guild_id = ?", (guild_id,)).fetchall()
+                return [row[0] for row in rows]
+        except sqlite3.Error as e:
+            logger.error("Error fetching excluded channels: %s", e)
+            return []
+
+    ### Jobs, not instrumented since idle workers poll them continuously
+
+    def enqueue_job(self, guild_id: int, job_type: str, payload: str, dedupe_key: Optional[str],
+                    available_at: datetime) -> bool:
+        now = datetime.now()
+        try:
+            with self._transaction() as cursor:
+                cursor.execute("""
+                    INSERT OR IGNORE INTO Jobs (guild_id, job_type, payload, status, dedupe_key, available_at, created_at, updated_at)
+                    VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)
+                """, (guild_id, job_type, payload, dedupe_key, available_at, now, now))
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error("Error enqueueing %s job: %s", job_type, e)
+            return False
+
+    def claim_job(self, worker_id: str, lease_until: datetime, max_attempts: int) -> Optional[Job]:
+        now = datetime.now()
+        try:
+            with self._transaction() as cursor:
+                while True:
+                    cursor.execute("""
+                        SELECT job_id, job_type, payload, attempts FROM Jobs
+                        WHERE status IN ('queued', 'running') AND available_at <= ?
+                        ORDER BY available_at, job_id
+                        LIMIT 1
+                    """, (now,))
+                    row = cursor.fetchone()
+                    if not row:
+                        return None
+                    job_id, job_type, payload, attempts = row
+                    if attempts < max_attempts:
+                        break
+                    # Its last attempt never finished, the worker running it died
+                    logger.error("Job %s (%s) moved to dead letter after %d attempts: lease expired", job_id, job_type, attempts)
+                    cursor.execute("""
+                        UPDATE Jobs
+                        SET status = 'dead', last_error = 'Lease expired', locked_by = NULL, dedupe_key = NULL, updated_at = ?
+                        WHERE job_id = ?
+                    """, (now, job_id))
+                cursor.execute("""
+                    UPDATE Jobs
+                    SET status = 'running', attempts = attempts + 1, locked_by = ?,
+                        available_at = ?, updated_at = ?
+                    WHERE job_id = ?
+                """, (worker_id, lease_until, now, job_id))
+            return Job(job_id=job_id, job_type=job_type, payload=json.loads(payload), attempts=attempts + 1)
+        except sqlite3.Error as e:
+            logger.error("Error claiming job: %s", e)
+            return None
+
+    def update_job(self, job_id: int, worker_id: str, **fields) -> Optional[int]:
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        try:
+            with self._transaction() as cursor:
+                cursor.execute(f"""
+                    UPDATE Jobs
+                    SET {assignments}, updated_at = ?
+                    WHERE job_id = ? AND locked_by = ? AND status = 'running'
+                """, (*fields.values(), datetime.now(), job_id, worker_id))
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.error("Error updating job %s: %s", job_id, e)
+            return None
+
+    def recover_jobs(self) -> int:
+        now = datetime.now()
+        try:
+            with self._transaction() as cursor:
+                cursor.execute("""
+                    UPDATE Jobs
+                    SET status = 'queued', locked_by = NULL, updated_at = ?
+                    WHERE status = 'running' AND available_at <= ?
+                """, (now, now))
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.error("Error recovering jobs: %s", e)
+            return 0
+
+    ### Backfill checkpoints and resolved URLs
+
+    @instrumented
+    def get_backfill_checkpoint(self, guild_id: int, channel_id: int) -> Optional[int]:
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute("""
+                    SELECT last_message_id FROM BackfillCheckpoints
+                    WHERE guild_id = ? AND channel_id = ?
+                """, (guild_id, channel_id)).fetchone()
+                return row[0] if row else None
+        except sqlite3.Error as e:
+            logger.error("Error fetching backfill checkpoint: %s", e)
+            return None
+
+    @instrumented
+    def save_backfill_checkpoint(self, guild_id: int, channel_id: int, message_id: int) -> bool:
+        try:
+            with self._transaction() as cursor:
+                cursor.execute("""
+                    INSERT INTO BackfillCheckpoints (guild_id, channel_id, last_message_id, updated_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (guild_id, channel_id)
+                    DO UPDATE SET last_message_id = excluded.last_message_id, updated_at = excluded.updated_at
+                """, (guild_id, channel_id, message_id, datetime.now()))
+                return True
+        except sqlite3.Error as e:
+            logger.error("Error saving backfill checkpoint: %s", e)
+            return False
+
+    @instrumented
+    def get_resolved_url(self, url: str, not_before: datetime) -> Optional[str]:
+        try:
+            with self._get_connection() as conn:
+                row = conn.execute("""
+                    SELECT resolved_url FROM ResolvedUrls
+                    WHERE url_hash = ? AND resolved_at > ?
+                """, (self._url_hash(url), not_before)).fetchone()
+                return row[0] if row else None
+        except sqlite3.Error as e:
+            logger.error("Error fetching resolved URL: %s", e)
+            return None
+
+    @instrumented
+    def save_resolved_url(self, url: str, resolved: str) -> bool:
+        try:
+            with self._transaction() as cursor:
+                cursor.execute("""
+                    INSERT INTO ResolvedUrls (url_hash, resolved_url, resolved_at)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT (url_hash)
+                    DO UPDATE SET resolved_url = excluded.resolved_url, resolved_at = excluded.resolved_at
+                """, (self._url_hash(url), resolved, datetime.now()))
+                return True
+        except sqlite3.Error as e:
+            logger.error("Error saving resolved URL: %s", e)
+            return False
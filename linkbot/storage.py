@@ -0,0 +1,219 @@
+# storage.py
+import hashlib
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional, Tuple
+from linkbot.config import DB_BACKEND, DB_CONFIG, DB_POOL_SIZE, LINK_CACHE_SIZE, LINK_CACHE_TTL, SQLITE_PATH
+from linkbot.lru_cache import LRUCache
+from linkbot.metrics import DB_QUERY_SECONDS
+from linkbot.models import Job, Link, LinkRef, SaveResult, SummaryStatus
+from linkbot.tracing import traced
+from linkbot.url_canonicalizer import canonicalize_url
+
+def instrumented(func):
+    """Record the latency and a trace span of each call to a storage method"""
+    return DB_QUERY_SECONDS.timed('method')(traced('db')(func))
+
+def search_terms(query: str) -> list[str]:
+    """Words of a search query, without operators of either full-text syntax"""
+    return re.findall(r'\w+', query.lower())
+
+class StorageBackend(ABC):
+    """Everything the bot stores, implemented by DBClient (MySQL) and SQLiteDBClient.
+
+    Implementations catch their own database errors, log them and return
+    False, None or an empty result like the rest of the bot expects. Every
+    abstract method must be implemented, a backend missing one fails when
+    it is constructed.
+
+    Active links are kept in an LRU by (guild_id, canonical URL) in front
+    of get_link_ref_by_url. Implementations write through to it from
+    save_link, delete_link and restore_link, invalidating by URL so an
+    entry and its link_id are always evicted together.
+    """
+
+    # Column order matches the Link and LinkRef fields, rows are mapped positionally
+    LINK_COLUMNS = ", ".join(Link._fields)
+    LINK_REF_COLUMNS = ", ".join(LinkRef._fields)
+
+    def __init__(self, link_cache_size: int = LINK_CACHE_SIZE, link_cache_ttl: float = LINK_CACHE_TTL):
+        self._link_cache = LRUCache(link_cache_size, ttl=link_cache_ttl, name='links')
+
+    @staticmethod
+    def _url_hash(web_url: str) -> bytes:
+        """Fixed-size key for URL lookups, the SHA-256 of the canonical URL"""
+        return hashlib.sha256(canonicalize_url(web_url).encode('utf-8')).digest()
+
+    ### Links
+
+    @abstractmethod
+    def adopt_legacy_rows(self, guild_id: int) -> int:
+        """Assign rows saved before guild partitioning (guild_id 0) to a guild"""
+
+    @abstractmethod
+    def canonicalize_stored_urls(self, batch_size: int = 500) -> int:
+        """Rewrite links saved before URL canonicalization, returns the number rewritten"""
+
+    @abstractmethod
+    def save_link(self, guild_id: int, web_url: str, summary: str, category: str,
+                  summary_status: str = SummaryStatus.DONE) -> Optional[SaveResult]:
+        """Save a link as the active version of its URL, superseding the previous active version"""
+
+    @abstractmethod
+    def save_links_bulk(self, guild_id: int, links: list[Tuple[str, datetime]]) -> int:
+        """Insert (web_url, creation_date) pairs with pending summaries, skipping URLs that are already active"""
+
+    @abstractmethod
+    def get_pending_link_refs(self, guild_id: int, urls: list[str]) -> list[LinkRef]:
+        ...
+
+    @abstractmethod
+    def update_link_summary(self, link_id: int, summary: str, category: str, summary_status: str) -> bool:
+        ...
+
+    @abstractmethod
+    def get_links_needing_summary(self, max_attempts: int, limit: int = 100) -> list[Link]:
+        ...
+
+    @abstractmethod
+    def get_links_by_category(self, guild_id: int, after: Optional[Tuple[datetime, int]] = None,
+                              limit: Optional[int] = None) -> dict:
+        """Rows (category, web_url, summary, link_id, creation_date as dicts) grouped by category, newest first"""
+
+    @abstractmethod
+    def get_links_by_ids(self, guild_id: int, link_ids: list[int]) -> list[Link]:
+        ...
+
+    @abstractmethod
+    def get_link_by_url(self, guild_id: int, url: str) -> Optional[Link]:
+        ...
+
+    def get_link_ref_by_url(self, guild_id: int, url: str) -> Optional[LinkRef]:
+        """Find an active link by its URL without loading its summary, from the link cache when possible"""
+        key = (guild_id, canonicalize_url(url))
+        link = self._link_cache.get(key)
+        if link is None:
+            link = self._select_link_ref_by_url(guild_id, url)
+            if link is not None:
+                self._cache_link(guild_id, link)
+        return link
+
+    @abstractmethod
+    def _select_link_ref_by_url(self, guild_id: int, url: str) -> Optional[LinkRef]:
+        ...
+
+    def _cache_link(self, guild_id: int, link: LinkRef):
+        """Remember the active version of a link's URL"""
+        self._link_cache.set((guild_id, canonicalize_url(link.web_url)), link)
+
+    def _cache_restored_link(self, guild_id: int, link_id: int):
+        """Remember a link that became the active version of its URL again"""
+        for link in self.get_links_by_ids(guild_id, [link_id]):
+            self._cache_link(guild_id, LinkRef(link.link_id, link.web_url, link.deleted, link.creation_date))
+
+    def _uncache_link(self, guild_id: int, web_url: str, link_id: int):
+        """Forget a link that is no longer the active version of its URL"""
+        key = (guild_id, canonicalize_url(web_url))
+        cached = self._link_cache.pop(key)
+        # A newer version of the URL stays cached
+        if cached is not None and cached.link_id != link_id:
+            self._link_cache.set(key, cached)
+
+    @abstractmethod
+    def get_all_links(self, guild_id: int, include_deleted: bool = False) -> list[Link]:
+        ...
+
+    @abstractmethod
+    def get_link_refs_page(self, guild_id: int, include_deleted: bool = False,
+                           after: Optional[Tuple[datetime, int]] = None, limit: int = 15) -> list[LinkRef]:
+        ...
+
+    @abstractmethod
+    def delete_link(self, guild_id: int, link_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    def restore_link(self, guild_id: int, link_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    def get_recent_links(self, guild_id: int, days_ago: int = None, limit: int = None) -> list[Link]:
+        ...
+
+    @abstractmethod
+    def search_links(self, guild_id: int, query: str, limit: int = 15) -> list[LinkRef]:
+        """Active links whose URL or summary matches the words of `query`, best matches first"""
+
+    ### Guild settings and channel exclusions
+
+    @abstractmethod
+    def get_guild_settings(self, guild_id: int) -> dict[str, str]:
+        """Setting overrides of a guild by key"""
+
+    @abstractmethod
+    def set_guild_setting(self, guild_id: int, key: str, value: Optional[str]) -> bool:
+        """Override a setting, or remove the override when value is None"""
+
+    @abstractmethod
+    def add_excluded_channel(self, guild_id: int, channel_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def remove_excluded_channel(self, guild_id: int, channel_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def get_excluded_channels(self, guild_id: int) -> list[str]:
+        ...
+
+    ### Jobs
+
+    @abstractmethod
+    def enqueue_job(self, guild_id: int, job_type: str, payload: str, dedupe_key: Optional[str],
+                    available_at: datetime) -> bool:
+        """Insert a queued job, False when a live job with the same dedupe_key exists"""
+
+    @abstractmethod
+    def claim_job(self, worker_id: str, lease_until: datetime, max_attempts: int) -> Optional[Job]:
+        """Lease the oldest due job, including running jobs whose lease expired, to a worker.
+
+        Claims count as attempts. Due jobs that already used max_attempts
+        crashed their workers on the last one and are dead-lettered instead.
+        """
+
+    @abstractmethod
+    def update_job(self, job_id: int, worker_id: str, **fields) -> Optional[int]:
+        """Set columns of a running job leased to `worker_id`. Returns the rows updated, None on error."""
+
+    @abstractmethod
+    def recover_jobs(self) -> int:
+        """Requeue running jobs whose lease expired, returns the number recovered"""
+
+    ### Backfill checkpoints and resolved URLs
+
+    @abstractmethod
+    def get_backfill_checkpoint(self, guild_id: int, channel_id: int) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def save_backfill_checkpoint(self, guild_id: int, channel_id: int, message_id: int) -> bool:
+        ...
+
+    @abstractmethod
+    def get_resolved_url(self, url: str, not_before: datetime) -> Optional[str]:
+        """Resolved form of `url` if it was stored after `not_before`"""
+
+    @abstractmethod
+    def save_resolved_url(self, url: str, resolved: str) -> bool:
+        ...
+
+def create_db_client() -> StorageBackend:
+    """The storage backend selected by DB_BACKEND"""
+    if DB_BACKEND == 'sqlite':
+        from linkbot.sqlite_database import SQLiteDBClient
+        return SQLiteDBClient(SQLITE_PATH)
+    if DB_BACKEND != 'mysql':
+        raise ValueError(f"Unknown DB_BACKEND {DB_BACKEND!r}, expected mysql or sqlite")
+    from linkbot.database import DBClient
+    return DBClient(DB_CONFIG, DB_POOL_SIZE)
@@ -0,0 +1,114 @@
+# tracing.py
+import asyncio
+import functools
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+try:
+    from opentelemetry import context as otel_context, propagate, trace
+except ImportError:  # Tracing is optional, spans are no-ops without the opentelemetry packages
+    trace = None
+
+TRACER_NAME = "linkbot"
+
+def setup_tracing(service_name: str, file_path: Optional[str] = None, otlp_endpoint: Optional[str] = None) -> bool:
+    """Export spans to a JSON lines file and/or an OTLP/HTTP collector. Returns False when tracing stays off."""
+    if trace is None or not (file_path or otlp_endpoint):
+        return False
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    # Batching keeps exporting off the event loop, spans are written from a background thread
+    if file_path:
+        exporter = ConsoleSpanExporter(
+            out=open(file_path, 'a', encoding='utf-8'),
+            formatter=lambda span: span.to_json(indent=None) + '\n'
+        )
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+    if otlp_endpoint:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=otlp_endpoint)))
+    trace.set_tracer_provider(provider)
+    return True
+
+@contextmanager
+def span(name: str, parent: Optional[dict] = None, **attributes):
+    """Run a block in a child span of the current span, or of the context propagated in `parent`"""
+    if trace is None:
+        yield None
+        return
+    token = otel_context.attach(propagate.extract(parent)) if parent is not None else None
+    try:
+        attributes = {key: value for key, value in attributes.items() if value is not None}
+        with trace.get_tracer(TRACER_NAME).start_as_current_span(name, attributes=attributes) as current:
+            yield current
+    finally:
+        if token is not None:
+            otel_context.detach(token)
+
+def set_attributes(**attributes):
+    """Add attributes to the current span"""
+    if trace is None:
+        return
+    current = trace.get_current_span()
+    for key, value in attributes.items():
+        if value is not None:
+            current.set_attribute(key, value)
+
+def inject_context(carrier: dict) -> dict:
+    """Store the current trace context in a job payload so its handler continues the same trace"""
+    if trace is not None:
+        propagate.inject(carrier)
+    return carrier
+
+def url_host(url: str) -> Optional[str]:
+    return urlsplit(url).hostname
+
+def traced(prefix: str):
+    """Decorator running each call in a span named `<prefix>.<function name>`.
+
+    Calls returning a list or dict record its length as `<prefix>.rows`.
+    """
+    def decorator(func):
+        name = f"{prefix}.{func.__name__}"
+
+        def record_rows(result):
+            if isinstance(result, (list, dict)):
+                set_attributes(**{f"{prefix}.rows": len(result)})
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    result = await func(*args, **kwargs)
+                    record_rows(result)
+                    return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                result = func(*args, **kwargs)
+                record_rows(result)
+                return result
+        return wrapper
+    return decorator
+
+def instrument_discord_http(http):
+    """Trace every Discord REST request, including time spent waiting on rate limits"""
+    request = http.request
+
+    @functools.wraps(request)
+    async def traced_request(route, **kwargs):
+        with span(f"discord {route.method} {route.path}", **{
+            'http.method': route.method,
+            'discord.route': route.path,
+            'discord.channel_id': str(route.channel_id) if route.channel_id else None,
+            'discord.guild_id': str(route.guild_id) if route.guild_id else None,
+        }):
+            return await request(route, **kwargs)
+
+    http.request = traced_request
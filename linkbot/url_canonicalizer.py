@@ -0,0 +1,78 @@
+# url_canonicalizer.py
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+URL_PATTERN = re.compile(r'https?://\S+')
+
+# Characters that end a sentence or markdown/spoiler markup rather than the URL
+TRAILING_PUNCTUATION = '.,;:!?\'"*_~|'
+CLOSING_BRACKETS = {')': '(', ']': '[', '}': '{', '>': '<'}
+
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid', 'igshid',
+    'mc_cid', 'mc_eid', '_hsenc', '_hsmi', 'mkt_tok', 'ref_src', 'ref_url', 'si', 'spm',
+}
+TRACKING_PREFIXES = ('utm_',)
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def trim_url(url: str) -> str:
+    """Strip punctuation that was captured after the end of a URL in chat text"""
+    while url:
+        last = url[-1]
+        if last in TRAILING_PUNCTUATION:
+            url = url[:-1]
+        # Keep balanced brackets such as wiki/Foo_(bar), drop the closing half of (<url>) or [text](url)
+        elif last in CLOSING_BRACKETS and url.count(last) > url.count(CLOSING_BRACKETS[last]):
+            url = url[:-1]
+        else:
+            break
+    return url
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so that the different spellings of one page compare equal.
+
+    Lowercases the scheme and host, drops default ports, trailing slashes,
+    tracking parameters and fragments. Calling it on its own output returns
+    the same URL.
+    """
+    url = trim_url(url.strip())
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return url
+
+    host = parts.hostname.rstrip('.')
+    if ':' in host:
+        host = f"[{host}]"
+    if port and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+    userinfo = parts.netloc.rpartition('@')[0]
+    netloc = f"{userinfo}@{host}" if userinfo else host
+
+    path = parts.path or '/'
+    if path != '/':
+        path = path.rstrip('/') or '/'
+
+    # Filter the raw query so the remaining parameters keep their original encoding and order
+    query = '&'.join(
+        param for param in parts.query.split('&')
+        if param and not _is_tracking_param(param.partition('=')[0])
+    )
+
+    # Fragments only address part of a page, except for hash-routed single page apps
+    fragment = parts.fragment if parts.fragment.startswith(('/', '!')) else ''
+
+    return urlunsplit((scheme, netloc, path, query, fragment))
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+def extract_urls(text: str) -> list[str]:
+    """Canonical URLs found in a message, without duplicates and in order of appearance"""
+    urls = (canonicalize_url(match) for match in URL_PATTERN.findall(text))
+    return list(dict.fromkeys(url for url in urls if URL_PATTERN.fullmatch(url)))
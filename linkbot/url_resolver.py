@@ -0,0 +1,113 @@
+# url_resolver.py
+import aiohttp
+import logging
+from bs4 import BeautifulSoup
+from datetime import datetime, timedelta
+from typing import Optional
+from urllib.parse import urljoin, urlsplit
+from linkbot.lru_cache import LRUCache
+from linkbot.url_canonicalizer import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# Hosts that only redirect to another page, resolved even when RESOLVE_REDIRECTS is off
+SHORT_LINK_HOSTS = {
+    't.co', 'bit.ly', 'youtu.be', 'tinyurl.com', 'goo.gl', 'ow.ly', 'buff.ly', 'is.gd', 'lnkd.in',
+    'amzn.to', 'a.co', 'redd.it', 'trib.al', 'dlvr.it', 'rebrand.ly', 'cutt.ly', 'shorturl.at', 'tiny.cc',
+}
+
+# Enough of a page to reach its <head>, AMP pages declare their canonical URL there
+HEAD_READ_LIMIT = 64 * 1024
+
+class RedirectResolver:
+    """Resolves short links, redirects and AMP pages to the canonical URL of the page.
+
+    Redirects are followed with HEAD requests. Only pages that look like AMP
+    copies are downloaded, and only up to their <head>, to read
+    <link rel="canonical">. Results are kept in an in-process LRU in front of
+    the ResolvedUrls table, so every process shares them until they expire.
+    """
+
+    def __init__(self, db_client, resolve_all: bool = False, cache_size: int = 4096, cache_ttl: float = 86400,
+                 timeout: float = 5):
+        self.db = db_client
+        self.resolve_all = resolve_all
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout
+        self._cache = LRUCache(cache_size, ttl=cache_ttl, name='resolved_urls')
+
+    def should_resolve(self, url: str) -> bool:
+        return self.resolve_all or self._is_short_link(url) or self._is_amp(url)
+
+    async def resolve(self, url: str) -> str:
+        """Canonical final URL of `url`, or its canonical form when it is not resolved or resolving fails"""
+        url = canonicalize_url(url)
+        if not self.should_resolve(url):
+            return url
+        resolved = self._cache.get(url)
+        if resolved is None:
+            resolved = self._load(url)
+            if resolved is None:
+                resolved = await self._follow(url)
+                if resolved is None:
+                    return url
+                self._store(url, resolved)
+            self._cache.set(url, resolved)
+        return resolved
+
+    async def _follow(self, url: str) -> Optional[str]:
+        try:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+                final = None
+                try:
+                    async with session.head(url, allow_redirects=True) as response:
+                        if response.status < 400:
+                            final = str(response.url)
+                except aiohttp.ClientError:
+                    pass
+
+                # Some servers reject HEAD, and AMP pages only name their canonical URL in the markup
+                if final is None or self._is_amp(final):
+                    async with session.get(final or url, allow_redirects=True) as response:
+                        if response.status >= 400:
+                            return None
+                        final = str(response.url)
+                        if 'html' in response.content_type:
+                            head = await response.content.read(HEAD_READ_LIMIT)
+                            final = self._canonical_link(head.decode(response.charset or 'utf-8', errors='ignore'), final) or final
+                return canonicalize_url(final)
+        except Exception as e:
+            logger.warning("Error resolving %s: %s", url, e)
+            return None
+
+    @staticmethod
+    def _canonical_link(html: str, base_url: str) -> Optional[str]:
+        end = html.lower().find('</head>')
+        soup = BeautifulSoup(html[:end] if end != -1 else html, 'html.parser')
+        link = soup.find('link', rel='canonical', href=True)
+        if not link:
+            return None
+        canonical = urljoin(base_url, link['href'].strip())
+        return canonical if urlsplit(canonical).scheme in ('http', 'https') else None
+
+    @staticmethod
+    def _is_short_link(url: str) -> bool:
+        host = urlsplit(url).hostname or ''
+        return host.removeprefix('www.') in SHORT_LINK_HOSTS
+
+    @staticmethod
+    def _is_amp(url: str) -> bool:
+        parts = urlsplit(url)
+        host = parts.hostname or ''
+        return (
+            host.startswith('amp.')
+            or host.endswith('.ampproject.org')
+            or 'amp' in parts.path.lower().split('/')
+            or any(param.partition('=')[0] == 'amp' for param in parts.query.split('&'))
+        )
+
+    def _load(self, url: str) -> Optional[str]:
+        return self.db.get_resolved_url(url, datetime.now() - timedelta(seconds=self.cache_ttl))
+
+    def _store(self, url: str, resolved: str) -> bool:
+        return self.db.save_resolved_url(url, resolved)
@@ -1,23 +1,146 @@
 # web_scraper.py
 import aiohttp
+import asyncio
+import codecs
+import io
+import logging
+import os
+import time
 from bs4 import BeautifulSoup
+from typing import Optional, Union
+from urllib.parse import unquote, urlsplit
+from linkbot.config import PAGE_MAX_BYTES, PDF_MAX_PAGES, PDF_MAX_BYTES
+from linkbot.metrics import FAILURES, SCRAPE_SECONDS
+from linkbot.tracing import set_attributes, traced, url_host
+
+logger = logging.getLogger(__name__)
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # PDF text extraction is optional, PDFs are described by their metadata without it
+    PdfReader = None
+
+MAX_CONTENT_LENGTH = 10000
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+TEXT_TYPES = ('application/json', 'application/xml', 'application/rss+xml', 'application/atom+xml')
+MEDIA_PREFIXES = ('image/', 'video/', 'audio/')
 
 class WebScraper:
     @staticmethod
+    @traced('scrape')
     async def get_web_content(url: str) -> str:
+        start = time.perf_counter()
+        content, kind = await WebScraper._fetch(url)
+        SCRAPE_SECONDS.observe(time.perf_counter() - start, content=kind)
+        set_attributes(**{'url.host': url_host(url), 'scrape.content': kind, 'scrape.chars': len(content)})
+        return content
+
+    @staticmethod
+    async def _fetch(url: str) -> tuple[str, str]:
+        """Page content and the kind of content it was extracted from"""
         try:
             async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
                 async with session.get(url) as response:
                     if response.status != 200:
-                        return ""
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    for element in soup(['script', 'style', 'nav', 'footer']):
-                        element.decompose()
-                        
-                    text = soup.get_text(separator='\n', strip=True)
-                    return text[:10000]  # Limit to 10k characters
+                        return "", 'http_error'
+                    content_type = response.content_type
+
+                    # Dispatch on the headers before reading the body, so unusable downloads are never started
+                    if content_type == 'application/pdf':
+                        return await WebScraper._pdf_content(url, response), 'pdf'
+                    if content_type.startswith(MEDIA_PREFIXES):
+                        return WebScraper._media_description(url, response), 'media'
+                    if content_type not in HTML_TYPES:
+                        if content_type.startswith('text/') or content_type in TEXT_TYPES:
+                            data = await WebScraper._read_body(response)
+                            text = data.decode(WebScraper._charset(response) or 'utf-8', errors='replace')
+                            return text[:MAX_CONTENT_LENGTH], 'text'
+                        # Archives, executables and other binaries have nothing to summarize
+                        return "", 'binary'
+
+                    # Bytes let BeautifulSoup follow a <meta charset> when the headers name none
+                    data = await WebScraper._read_body(response)
+                    return WebScraper._extract_html(data, WebScraper._charset(response)), 'html'
         except Exception as e:
-            print(f"Scraping error: {str(e)}")
-            return ""
\ No newline at end of file
+            logger.warning("Scraping error for %s: %s", url, e)
+            FAILURES.inc(stage='scrape')
+            return "", 'error'
+
+    @staticmethod
+    async def _read_body(response: aiohttp.ClientResponse) -> bytes:
+        """Body of a text response, cut off after PAGE_MAX_BYTES"""
+        data = bytearray()
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            data += chunk
+            if len(data) >= PAGE_MAX_BYTES:
+                del data[PAGE_MAX_BYTES:]
+                break
+        # A character split at the cut is replaced when decoding rather than failing the page
+        return bytes(data)
+
+    @staticmethod
+    def _charset(response: aiohttp.ClientResponse) -> Optional[str]:
+        """Charset named by the headers, None when missing or unknown to Python (e.g. utf8mb4)"""
+        if not response.charset:
+            return None
+        try:
+            return codecs.lookup(response.charset).name
+        except LookupError:
+            return None
+
+    @staticmethod
+    def _extract_html(html: Union[str, bytes], encoding: Optional[str] = None) -> str:
+        """Visible text of a page, without scripts, styles, navigation and footers.
+
+        Bytes are decoded as `encoding`, or else as the page declares or BeautifulSoup detects.
+        """
+        soup = BeautifulSoup(html, 'html.parser', from_encoding=encoding)
+
+        for element in soup(['script', 'style', 'nav', 'footer']):
+            element.decompose()
+
+        text = soup.get_text(separator='\n', strip=True)
+        return text[:MAX_CONTENT_LENGTH]  # Limit to 10k characters
+
+    @staticmethod
+    async def _pdf_content(url: str, response: aiohttp.ClientResponse) -> str:
+        """Text of the first PDF_MAX_PAGES pages, read from at most PDF_MAX_BYTES of download"""
+        description = WebScraper._media_description(url, response)
+        if PdfReader is None or (response.content_length or 0) > PDF_MAX_BYTES:
+            return description
+
+        # The page index sits at the end of a PDF, so the whole file is needed, but never more than the cap
+        data = io.BytesIO()
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            data.write(chunk)
+            if data.tell() > PDF_MAX_BYTES:
+                return description
+
+        text = await asyncio.to_thread(WebScraper._extract_pdf_text, data)
+        return f"{description}\n{text}"[:MAX_CONTENT_LENGTH] if text else description
+
+    @staticmethod
+    def _extract_pdf_text(data: io.BytesIO) -> str:
+        reader = PdfReader(data)
+        parts = []
+        title = reader.metadata.title if reader.metadata else None
+        if title:
+            parts.append(f"Title: {title}")
+        length = 0
+        for page in reader.pages[:PDF_MAX_PAGES]:
+            page_text = page.extract_text() or ""
+            parts.append(page_text)
+            length += len(page_text)
+            if length >= MAX_CONTENT_LENGTH:
+                break
+        return "\n".join(parts).strip()
+
+    @staticmethod
+    def _media_description(url: str, response: aiohttp.ClientResponse) -> str:
+        """Describe a file from its URL and headers without downloading it"""
+        parts = urlsplit(url)
+        name = unquote(os.path.basename(parts.path)) or parts.hostname
+        description = f"File: {name}\nType: {response.content_type}\nSource: {parts.hostname}"
+        if response.content_length:
+            description += f"\nSize: {response.content_length / 1024:.0f} KB"
+        return description
@@ -0,0 +1,33 @@
+# worker.py
+import asyncio
+import logging
+from linkbot.config import DISCORD_TOKEN, TRACING_FILE, TRACING_OTLP_ENDPOINT, WORKER_METRICS_PORT
+from linkbot.discord_bot import LinkBot
+from linkbot.openai_client import OpenAIClient
+from linkbot.logging_setup import setup_logging
+from linkbot.storage import create_db_client
+from linkbot.tracing import setup_tracing
+
+logger = logging.getLogger(__name__)
+
+async def run_worker():
+    """Process queued jobs without connecting to the Discord gateway.
+
+    The bot only logs in over REST, which is enough to send and edit
+    messages, so any number of these can run next to one gateway process.
+    """
+    setup_tracing("linkbot-worker", TRACING_FILE, TRACING_OTLP_ENDPOINT)
+    db = create_db_client()
+    ai = OpenAIClient()
+    bot = LinkBot(db, ai, run_job_workers=True, metrics_port=WORKER_METRICS_PORT, run_summary_sweep=False)
+    async with bot:
+        await bot.login(DISCORD_TOKEN)  # Runs setup_hook, which starts the job workers
+        logger.info("Worker %s processing jobs", bot.job_queue.worker_id)
+        await asyncio.Event().wait()
+
+def main():
+    setup_logging()
+    try:
+        asyncio.run(run_worker())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,39 @@
+import pytest
+from linkbot.sqlite_database import SQLiteDBClient
+
+GUILD_ID = 1
+
+@pytest.fixture
+def db(tmp_path):
+    client = SQLiteDBClient(str(tmp_path / "links.db"))
+    yield client
+    client.close()
+
+def test_deleted_link_is_not_served_after_other_links_evict_its_neighbours(db):
+    db._link_cache.maxsize = 2
+    a = db.save_link(GUILD_ID, "https://example.com/a", "", "")
+    db.save_link(GUILD_ID, "https://example.com/b", "", "")
+    assert db.get_link_ref_by_url(GUILD_ID, "https://example.com/a").link_id == a.link_id
+    db.save_link(GUILD_ID, "https://example.com/c", "", "")
+
+    assert db.delete_link(GUILD_ID, a.link_id)
+
+    assert db.get_link_ref_by_url(GUILD_ID, "https://example.com/a") is None
+    assert db._select_link_ref_by_url(GUILD_ID, "https://example.com/a") is None
+
+def test_delete_of_superseded_version_keeps_active_version_cached(db):
+    first = db.save_link(GUILD_ID, "https://example.com/a", "", "")
+    second = db.save_link(GUILD_ID, "https://example.com/a", "", "")
+
+    db.delete_link(GUILD_ID, first.link_id)
+
+    assert db.get_link_ref_by_url(GUILD_ID, "https://example.com/a").link_id == second.link_id
+
+def test_restored_link_is_served_again(db):
+    a = db.save_link(GUILD_ID, "https://example.com/a", "", "")
+    db.delete_link(GUILD_ID, a.link_id)
+    assert db.get_link_ref_by_url(GUILD_ID, "https://example.com/a") is None
+
+    assert db.restore_link(GUILD_ID, a.link_id)
+
+    assert db.get_link_ref_by_url(GUILD_ID, "https://example.com/a").link_id == a.link_id